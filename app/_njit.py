@@ -0,0 +1,23 @@
+"""
+Numba shim.
+
+Kalau numba ada -> kernel di-JIT. Kalau tidak terinstall, decorator jadi no-op
+dan kernel jalan sebagai Python biasa (hasil sama, cuma lebih lambat).
+"""
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - numba optional
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # Support both @njit and @njit(cache=True, ...)
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def wrap(fn):
+            return fn
+
+        return wrap
@@ -1,5 +1,77 @@
+import logging
+
 import google.generativeai as genai
 from app.config import settings
+from app.analysis.llm_cache import cache_get, cache_put, feature_key, zones_signature
+
+log = logging.getLogger(__name__)
+
+# Di-compile sekali, isi via format_map
+_GEMINI_PROMPT = """
+Role: You are a Senior Institutional Trader & Technical Analyst (SMC Strategy).
+Task: Analyze the current market setup for {symbol} on {timeframe} timeframe based on the data below.
+
+Technical Data:
+- Current Price: {close}
+- Trend Bias: {bias}
+- EMA Structure: EMA50 is {ema_pos} EMA200. Price is {price_pos} EMA50.
+- RSI (14): {rsi:.2f}
+- Key Zones: {zone_info}
+- Liquidity Event: {liq_sweep} ({liq_note})
+
+Output Requirement:
+1. Write a SHORT, PUNCHY analysis in BAHASA INDONESIA.
+2. Focus on: Why the bias is {bias}, logic of zones/liquidity, and potential scenario.
+3. Style: Professional but relaxed ("Bro", "Trader"). No hedging/disclaimer needed.
+4. Max Length: 2-3 short paragraphs.
+"""
+
+
+# Settings dibaca sekali (Settings frozen, tidak berubah selama proses jalan)
+_USE = settings.use_gemini
+_KEY = settings.gemini_api_key
+_MODEL_NAME = settings.gemini_model
+_TTL = settings.signal_cooldown_seconds
+
+# Configure sekali saat import, satu model dipakai ulang (auth & channel tidak di-init ulang)
+_MODEL = None
+if _USE and _KEY:
+    genai.configure(api_key=_KEY)
+    _MODEL = genai.GenerativeModel(_MODEL_NAME)
+
+
+def _cache_key(symbol, timeframe, bias, close, ema50, ema200, rsi, zones, liquidity) -> bytes:
+    return feature_key(
+        "gemini", symbol, timeframe, bias,
+        round(close, 2), round(ema50, 2), round(ema200, 2), round(rsi, 1),
+        zones_signature(zones), liquidity.get("sweep"), liquidity.get("notes"),
+    )
+
+
+def _build_prompt(symbol, timeframe, bias, close, ema50, ema200, rsi, zones, liquidity) -> str:
+    # Contextual Prompt
+    demand = zones.get("DEMAND")
+    supply = zones.get("SUPPLY")
+
+    zone_info = "No nearby zones."
+    if demand:
+        zone_info += f" Demand Zone at {demand['low']:.2f}-{demand['high']:.2f}."
+    if supply:
+        zone_info += f" Supply Zone at {supply['low']:.2f}-{supply['high']:.2f}."
+
+    return _GEMINI_PROMPT.format_map({
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "close": close,
+        "bias": bias,
+        "ema_pos": "ABOVE" if ema50 > ema200 else "BELOW",
+        "price_pos": "ABOVE" if close > ema50 else "BELOW",
+        "rsi": rsi,
+        "zone_info": zone_info,
+        "liq_sweep": liquidity.get("sweep", "None"),
+        "liq_note": liquidity.get("notes", "-"),
+    })
+
 
 def analyze_market_with_gemini(
     symbol: str,
@@ -15,48 +87,58 @@ def analyze_market_with_gemini(
     """
     Kirim data teknikal ke Gemini untuk dapat analisa naratif ala Institutional Trader.
     """
-    if not settings.use_gemini or not settings.gemini_api_key:
+    if _MODEL is None:
+        return "AI Analysis Disabled."
+
+    # Skip network kalau fitur (terkuantisasi) sama dengan call sebelumnya
+    ttl = _TTL
+    key = _cache_key(symbol, timeframe, bias, close, ema50, ema200, rsi, zones, liquidity)
+    cached = cache_get(key, ttl)
+    if cached is not None:
+        return cached
+
+    try:
+        prompt = _build_prompt(symbol, timeframe, bias, close, ema50, ema200, rsi, zones, liquidity)
+        response = _MODEL.generate_content(prompt, stream=False)
+        text = response.text.strip()
+        cache_put(key, text, ttl)
+        return text
+
+    except Exception as e:
+        log.warning("⚠️ Gemini Error: %s", e)
+        return f"AI Analysis Failed: {str(e)}"
+
+
+async def analyze_market_with_gemini_async(
+    symbol: str,
+    timeframe: str,
+    bias: str,
+    close: float,
+    ema50: float,
+    ema200: float,
+    rsi: float,
+    zones: dict,
+    liquidity: dict
+) -> str:
+    """
+    Async version of analyze_market_with_gemini (generate_content_async).
+    """
+    if _MODEL is None:
         return "AI Analysis Disabled."
 
+    ttl = _TTL
+    key = _cache_key(symbol, timeframe, bias, close, ema50, ema200, rsi, zones, liquidity)
+    cached = cache_get(key, ttl)
+    if cached is not None:
+        return cached
+
     try:
-        genai.configure(api_key=settings.gemini_api_key)
-        model = genai.GenerativeModel(settings.gemini_model)
-
-        # Contextual Prompt
-        liq_sweep = liquidity.get("sweep", "None")
-        liq_note = liquidity.get("notes", "-")
-        
-        demand = zones.get("DEMAND")
-        supply = zones.get("SUPPLY")
-        
-        zone_info = "No nearby zones."
-        if demand:
-            zone_info += f" Demand Zone at {demand['low']:.2f}-{demand['high']:.2f}."
-        if supply:
-            zone_info += f" Supply Zone at {supply['low']:.2f}-{supply['high']:.2f}."
-
-        prompt = f"""
-        Role: You are a Senior Institutional Trader & Technical Analyst (SMC Strategy).
-        Task: Analyze the current market setup for {symbol} on {timeframe} timeframe based on the data below.
-
-        Technical Data:
-        - Current Price: {close}
-        - Trend Bias: {bias}
-        - EMA Structure: EMA50 is {'ABOVE' if ema50 > ema200 else 'BELOW'} EMA200. Price is {'ABOVE' if close > ema50 else 'BELOW'} EMA50.
-        - RSI (14): {rsi:.2f}
-        - Key Zones: {zone_info}
-        - Liquidity Event: {liq_sweep} ({liq_note})
-
-        Output Requirement:
-        1. Write a SHORT, PUNCHY analysis in BAHASA INDONESIA.
-        2. Focus on: Why the bias is {bias}, logic of zones/liquidity, and potential scenario.
-        3. Style: Professional but relaxed ("Bro", "Trader"). No hedging/disclaimer needed.
-        4. Max Length: 2-3 short paragraphs.
-        """
-
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        prompt = _build_prompt(symbol, timeframe, bias, close, ema50, ema200, rsi, zones, liquidity)
+        response = await _MODEL.generate_content_async(prompt)
+        text = response.text.strip()
+        cache_put(key, text, ttl)
+        return text
 
     except Exception as e:
-        print(f"⚠️ Gemini Error: {e}")
-        return f"AI Analysis Failed: {str(e)}"
\ No newline at end of file
+        log.warning("⚠️ Gemini Error: %s", e)
+        return f"AI Analysis Failed: {str(e)}"
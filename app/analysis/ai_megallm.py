@@ -1,7 +1,85 @@
-from openai import OpenAI
+import logging
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
 from app.config import settings
+from app.analysis.llm_cache import cache_get, cache_put, feature_key, zones_signature
+
+log = logging.getLogger(__name__)
+
+# Prompt Engineer: Institutional Style with SCENARIOS
+# Bagian statis (role + instruksi) ada di system message -> identik tiap call,
+# jadi prefix cache provider (DeepSeek/OpenAI-compatible) bisa kena.
+_SYSTEM_MSG = """
+Role: Anda adalah Senior Analyst & Trader Institusional (SMC Specialist), mengandalkan Price Action & SMC.
+Tugas: Analisa setup market dari Data Teknikal yang dikirim user, untuk komunitas trader Indonesia.
+Konteks Laporan: WATCH = Belum ada entry valid. TRADE = Ada sinyal valid.
+
+Instruksi Output (Bahasa Indonesia Tegas & Santai):
+1. **Analisa Struktur**: Jelaskan kenapa Bias Struktur valid atau lemah berdasarkan EMA & Struktur.
+2. **Skenario Pergerakan**:
+   - "Jika harga break [Level Supply/Demand]..."
+   - "Jika harga reject di [Level]..."
+3. **Rekomendasi**:
+   - Kalau Konteks == 'TRADE': Validasi alasan entrynya.
+   - Kalau Konteks == 'WATCH': Kasih saran "Tunggu apa?" (misal: Tunggu Sweep low dulu).
+
+Format: Gunakan bullet points atau paragraf pendek. Jangan pakai disclaimer klise. Fokus ke "Actionable Insight".
+"""
+
+# Bagian yang berubah tiap call (di-compile sekali, isi via format_map)
+_MEGALLM_PROMPT = """
+Market: {symbol} (TF {timeframe})
+Konteks Laporan: {context}
 
-def analyze_market_with_megallm(
+Data Teknikal:
+- Harga Saat Ini: {close}
+- Bias Struktur: {bias}
+- Tren EMA: EMA50 {ema_pos} EMA200. Harga {price_pos} EMA50.
+- RSI (14): {rsi:.2f}
+- Zona Kunci: {zone_info}
+- Likuiditas: Sweep={liq_sweep}, Fakeout={fakeout}
+"""
+
+# context -> (max_tokens, temperature). WATCH cukup jawaban pendek.
+_GEN_PARAMS = {
+    "WATCH": (220, 0.4),
+    "TRADE": (450, 0.7),
+}
+
+# Settings dibaca sekali (Settings frozen, tidak berubah selama proses jalan)
+_ENABLED = settings.use_ai_narrative and bool(settings.megallm_api_key)
+_MODEL_NAME = settings.megallm_model
+_TTL = settings.signal_cooldown_seconds
+
+# Satu client untuk seluruh proses (keep-alive, skip TCP/TLS handshake per call)
+_client: Optional[AsyncOpenAI] = None
+
+
+def _get_client() -> AsyncOpenAI:
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=settings.megallm_api_key,
+            base_url=settings.megallm_base_url,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=8),
+            ),
+        )
+    return _client
+
+
+async def aclose() -> None:
+    """Tutup client (+ connection pool httpx) di event loop yang sama; dipanggil saat shutdown."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+async def analyze_market_with_megallm(
     symbol: str,
     timeframe: str,
     bias: str,
@@ -16,68 +94,63 @@ def analyze_market_with_megallm(
     """
     Kirim data teknikal ke MegaLLM (DeepSeek/OpenAI) untuk analisa naratif Institutional.
     """
-    if not settings.use_ai_narrative or not settings.megallm_api_key:
+    if not _ENABLED:
         return "AI Analysis Disabled."
 
+    # Skip network kalau fitur (terkuantisasi) sama dengan call sebelumnya
+    ttl = _TTL
+    key = feature_key(
+        "megallm", symbol, timeframe, bias, context,
+        round(close, 2), round(ema50, 2), round(ema200, 2), round(rsi, 1),
+        zones_signature(zones), liquidity.get("sweep"), liquidity.get("fake"),
+    )
+    cached = cache_get(key, ttl)
+    if cached is not None:
+        return cached
+
     try:
-        # Init Client (MegaLLM)
-        client = OpenAI(
-            api_key=settings.megallm_api_key,
-            base_url=settings.megallm_base_url
-        )
+        client = _get_client()
 
         # Contextual Prompt Construction
-        liq_sweep = liquidity.get("sweep", "None")
-        liq_note = liquidity.get("notes", "-")
-        fakeout = liquidity.get("fake", "None") 
-        
         demand = zones.get("DEMAND")
         supply = zones.get("SUPPLY")
-        
+
         zone_info = "Tidak ada zona terdekat."
         if demand:
             zone_info += f" DEMAND di {demand['low']:.2f}-{demand['high']:.2f}."
         if supply:
             zone_info += f" SUPPLY di {supply['low']:.2f}-{supply['high']:.2f}."
 
-        # Prompt Engineer: Institutional Style with SCENARIOS
-        prompt = f"""
-        Role: Anda adalah Senior Analyst & Trader Institusional (SMC Specialist). 
-        Tugas: Analisa setup market {symbol} (TF {timeframe}) untuk komunitas trader Indonesia.
-
-        Data Teknikal:
-        - Harga Saat Ini: {close}
-        - Bias Struktur: {bias}
-        - Tren EMA: EMA50 {'DI ATAS' if ema50 > ema200 else 'DI BAWAH'} EMA200. Harga {'DI ATAS' if close > ema50 else 'DI BAWAH'} EMA50.
-        - RSI (14): {rsi:.2f}
-        - Zona Kunci: {zone_info}
-        - Likuiditas: Sweep={liq_sweep}, Fakeout={fakeout}
-        - Konteks Laporan: {context} (Jika WATCH = Belum ada entry valid. Jika TRADE = Ada sinyal valid).
-
-        Instruksi Output (Bahasa Indonesia Tegas & Santai):
-        1. **Analisa Struktur**: Jelaskan kenapa bias {bias} valid atau lemah berdasarkan EMA & Struktur.
-        2. **Skenario Pergerakan**: 
-           - "Jika harga break [Level Supply/Demand]..."
-           - "Jika harga reject di [Level]..."
-        3. **Rekomendasi**: 
-           - Kalau {context} == 'TRADE': Validasi alasan entrynya.
-           - Kalau {context} == 'WATCH': Kasih saran "Tunggu apa?" (misal: Tunggu Sweep low dulu).
-        
-        Format: Gunakan bullet points atau paragraf pendek. Jangan pakai disclaimer klise. Fokus ke "Actionable Insight".
-        """
-
-        response = client.chat.completions.create(
-            model=settings.megallm_model,
+        prompt = _MEGALLM_PROMPT.format_map({
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "close": close,
+            "bias": bias,
+            "ema_pos": "DI ATAS" if ema50 > ema200 else "DI BAWAH",
+            "price_pos": "DI ATAS" if close > ema50 else "DI BAWAH",
+            "rsi": rsi,
+            "zone_info": zone_info,
+            "liq_sweep": liquidity.get("sweep", "None"),
+            "fakeout": liquidity.get("fake", "None"),
+            "context": context,
+        })
+
+        max_tokens, temperature = _GEN_PARAMS.get(context, _GEN_PARAMS["TRADE"])
+        response = await client.chat.completions.create(
+            model=_MODEL_NAME,
             messages=[
-                {"role": "system", "content": "You are a professional crypto/forex analyst relying on Price Action & SMC."},
+                {"role": "system", "content": _SYSTEM_MSG},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7,
-            max_tokens=450
+            temperature=temperature,
+            max_tokens=max_tokens
         )
 
-        return response.choices[0].message.content.strip()
+        text = response.choices[0].message.content.strip()
+        cache_put(key, text, ttl)
+        return text
 
     except Exception as e:
-        print(f"⚠️ AI/MegaLLM Error: {e}")
-        return f"AI Analysis Failed: {str(e)}"
\ No newline at end of file
+        log.warning("⚠️ AI/MegaLLM Error: %s", e)
+        return f"AI Analysis Failed: {str(e)}"
+
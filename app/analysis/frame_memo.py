@@ -0,0 +1,62 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLS = ("time", "open", "high", "low", "close", "volume")
+
+
+def frame_key(df: pd.DataFrame, cols: Iterable[str], *params: Hashable) -> Optional[tuple]:
+    """
+    Content key for a frame: blake2b over the given columns + call params.
+    Frame baru tiap tick (id() beda) tapi data sama -> key sama.
+    Returns None kalau ada kolom yang tidak bisa di-hash (object dtype).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for col in cols:
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if col == "time":
+            arr = s.to_numpy(dtype="datetime64[ns]")
+        else:
+            arr = s.to_numpy()
+        if arr.dtype == object:
+            return None
+        h.update(col.encode())
+        h.update(np.ascontiguousarray(arr).view(np.uint8))
+    return (len(df), h.digest()) + params
+
+
+class FrameMemo:
+    """
+    Small LRU (default 8 entries) for per-frame analysis results.
+    Hasil yang di-cache di-share antar call, jangan di-mutate.
+    Thread-safe (engine_loop analisa TF paralel di thread pool).
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Optional[tuple]) -> Any:
+        if key is None:
+            return None
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Optional[tuple], value: Any) -> None:
+        if key is None:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
@@ -1,11 +1,218 @@
 import pandas as pd
 import numpy as np
-from ta.trend import EMAIndicator
-from ta.momentum import RSIIndicator
-from ta.volatility import AverageTrueRange
+from typing import Dict, Optional, Tuple
 
+from app._njit import njit
+from app.analysis.frame_memo import OHLCV_COLS, FrameMemo, frame_key
 
-def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
+EMA_FAST = 50
+EMA_SLOW = 200
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+
+# (symbol, timeframe) -> state of the last CLOSED bar:
+#   times, ema50, ema200, rsi14 (arrays, closed bars only)
+#   rec = (prev_close, ema50, ema200, avg_gain, avg_loss)
+#   first_abs = jumlah bar sejak seed sebelum row pertama (buat min_periods)
+_EMA_RSI_STATE: Dict[Tuple[str, str], dict] = {}
+
+# Frame content -> computed columns (tick tanpa data baru = tinggal assign)
+_MEMO = FrameMemo(maxsize=8)
+_OUT_COLS = ("open", "high", "low", "close", "volume", "ema50", "ema200", "rsi14", "atr14", "vol_sma20", "vol_z20")
+
+
+@njit(cache=True)
+def _ema_rsi_pass(close, prev_close, ema_fast, ema_slow, avg_gain, avg_loss):
+    """
+    One fused pass: EMA50, EMA200 & RSI14 (Wilder) over `close`,
+    lanjut dari state sebelumnya. Returns output arrays + final state.
+    """
+    n = close.shape[0]
+    a_fast = 2.0 / (EMA_FAST + 1.0)
+    a_slow = 2.0 / (EMA_SLOW + 1.0)
+    a_rsi = 1.0 / RSI_WINDOW
+
+    out_fast = np.empty(n)
+    out_slow = np.empty(n)
+    out_rsi = np.empty(n)
+    for i in range(n):
+        x = close[i]
+        diff = x - prev_close
+        prev_close = x
+
+        ema_fast = a_fast * x + (1.0 - a_fast) * ema_fast
+        ema_slow = a_slow * x + (1.0 - a_slow) * ema_slow
+
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+        avg_gain = a_rsi * gain + (1.0 - a_rsi) * avg_gain
+        avg_loss = a_rsi * loss + (1.0 - a_rsi) * avg_loss
+
+        out_fast[i] = ema_fast
+        out_slow[i] = ema_slow
+        out_rsi[i] = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    return out_fast, out_slow, out_rsi, prev_close, ema_fast, ema_slow, avg_gain, avg_loss
+
+
+@njit(cache=True)
+def _rolling_mean_std(x, window):
+    """
+    Rolling mean & std (ddof=0) in one pass, Welford add/remove.
+    Window yang mengandung NaN -> NaN (sama dengan pandas rolling default).
+    """
+    n = x.shape[0]
+    mean_out = np.full(n, np.nan)
+    std_out = np.full(n, np.nan)
+
+    cnt = 0
+    nan_cnt = 0
+    mean = 0.0
+    m2 = 0.0
+    same_run = 0  # berapa bar berturut-turut nilainya sama (window konstan -> std 0 persis)
+    for i in range(n):
+        v = x[i]
+        if np.isnan(v):
+            nan_cnt += 1
+            same_run = 0
+        else:
+            cnt += 1
+            d = v - mean
+            mean += d / cnt
+            m2 += d * (v - mean)
+            same_run = same_run + 1 if (i > 0 and v == x[i - 1]) else 1
+
+        if i >= window:
+            old = x[i - window]
+            if np.isnan(old):
+                nan_cnt -= 1
+            else:
+                cnt -= 1
+                if cnt == 0:
+                    mean = 0.0
+                    m2 = 0.0
+                else:
+                    d = old - mean
+                    mean -= d / cnt
+                    m2 -= d * (old - mean)
+
+        if i >= window - 1 and nan_cnt == 0:
+            mean_out[i] = mean
+            if same_run >= window or m2 <= 0.0:
+                std_out[i] = 0.0
+            else:
+                std_out[i] = np.sqrt(m2 / cnt)
+
+    return mean_out, std_out
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    max(h-l, |h-prev_c|, |l-prev_c|), NaN di-skip (bar pertama = h-l).
+    """
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+@njit(cache=True)
+def _wilder_atr(tr, window, seed):
+    """
+    ATR Wilder: seed (mean tr[:window]) di index window-1, sebelum itu 0
+    (sama persis dengan ta AverageTrueRange).
+    """
+    n = tr.shape[0]
+    atr = np.zeros(n)
+    if n < window:
+        return atr
+    atr[window - 1] = seed
+    for i in range(window, n):
+        atr[i] = (atr[i - 1] * (window - 1) + tr[i]) / window
+    return atr
+
+
+def _atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = ATR_WINDOW) -> np.ndarray:
+    tr = _true_range(high, low, close)
+    head = tr[:window]
+    valid = np.count_nonzero(~np.isnan(head))
+    # Seed dijumlah di numpy (urutan penjumlahan sama dengan pandas mean)
+    seed = np.nansum(head) / valid if valid else np.nan
+    return _wilder_atr(tr, window, seed)
+
+
+def _ema_rsi(close: np.ndarray, times: Optional[np.ndarray], key: Optional[Tuple[str, str]]):
+    """
+    EMA50/EMA200/RSI14 with incremental reuse.
+    Bar terakhir dianggap masih jalan (forming), jadi state yang disimpan
+    selalu state bar CLOSED terakhir. Tiap call cuma bar closed baru +
+    forming bar yang lewat recurrence, sisanya splice dari cache.
+    """
+    n = len(close)
+    if n < 2:
+        nan = np.full(n, np.nan)
+        return nan, nan.copy(), nan.copy()
+
+    st = _EMA_RSI_STATE.get(key) if key else None
+    pos = -1
+    if st is not None:
+        c_times = st["times"]
+        # posisi bar closed terakhir (cached) di df baru + offset awal window
+        pos = int(np.searchsorted(times, c_times[-1]))
+        off = int(np.searchsorted(c_times, times[0]))
+        if (
+            pos >= n - 1
+            or times[pos] != c_times[-1]
+            or off >= len(c_times)
+            or c_times[off] != times[0]
+            or len(c_times) - off != pos + 1
+        ):
+            pos = -1
+
+    if pos < 0:
+        # Full recompute, seed dari close pertama (sama dengan ewm(adjust=False))
+        c0 = close[0]
+        rec = (c0, c0, c0, 0.0, 0.0)
+        head = (np.array([c0]), np.array([c0]), np.array([np.nan]))
+        start = 1
+        first_abs = 0
+    else:
+        off = len(st["times"]) - (pos + 1)
+        rec = st["rec"]
+        head = (st["ema50"][off:], st["ema200"][off:], st["rsi14"][off:])
+        start = pos + 1
+        first_abs = st["first_abs"] + off
+
+    # Closed bars baru, lalu forming bar (tidak masuk state)
+    new_fast, new_slow, new_rsi, *rec = _ema_rsi_pass(close[start : n - 1], *rec)
+    f_fast, f_slow, f_rsi, *_ = _ema_rsi_pass(close[n - 1 :], *rec)
+
+    ema_fast = np.concatenate((head[0], new_fast, f_fast))
+    ema_slow = np.concatenate((head[1], new_slow, f_slow))
+    rsi = np.concatenate((head[2], new_rsi, f_rsi))
+    # min_periods, dihitung dari bar seed (first_abs = index absolut row 0)
+    ema_fast[: max(0, EMA_FAST - 1 - first_abs)] = np.nan
+    ema_slow[: max(0, EMA_SLOW - 1 - first_abs)] = np.nan
+    rsi[: max(0, RSI_WINDOW - 1 - first_abs)] = np.nan
+
+    if key:
+        _EMA_RSI_STATE[key] = {
+            "times": times[: n - 1].copy(),
+            "ema50": ema_fast[: n - 1].copy(),
+            "ema200": ema_slow[: n - 1].copy(),
+            "rsi14": rsi[: n - 1].copy(),
+            "rec": tuple(rec),
+            "first_abs": first_abs,
+        }
+    return ema_fast, ema_slow, rsi
+
+
+def add_indicators(
+    df: pd.DataFrame,
+    symbol: Optional[str] = None,
+    timeframe: Optional[str] = None,
+    float32: bool = False,
+) -> pd.DataFrame:
     """
     Input df columns: time, open, high, low, close, volume
     Output adds:
@@ -14,28 +221,73 @@ def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
       - atr14
       - vol_sma20 (tick volume SMA)
       - vol_z20 (z-score volume vs last 20)
+
+    If symbol & timeframe are given, EMA/RSI state is cached per pair and
+    only new bars are pushed through the recurrence on the next call.
+
+    float32=True downcasts OHLCV to float32 (half the memory traffic for
+    the indicator passes); outputs are still read back with float().
+
+    NOTE: columns are written IN PLACE on `df` (no copy); the same frame is
+    returned. Caller owns the frame (fresh from fetch_ohlcv).
+    Memoized on frame content + (symbol, timeframe, float32).
     """
-    out = df.copy()
+    out = df
+
+    memo_key = frame_key(out, OHLCV_COLS, symbol, timeframe, float32)
+    cached = _MEMO.get(memo_key)
+    if cached is not None:
+        for col, arr in cached.items():
+            out[col] = arr.copy()
+        return out
 
     # Ensure numeric
     for col in ["open", "high", "low", "close", "volume"]:
         out[col] = pd.to_numeric(out[col], errors="coerce")
+        if float32:
+            out[col] = out[col].astype(np.float32, copy=False)
 
     # Indicators
-    out["ema50"] = EMAIndicator(close=out["close"], window=50).ema_indicator()
-    out["ema200"] = EMAIndicator(close=out["close"], window=200).ema_indicator()
-    out["rsi14"] = RSIIndicator(close=out["close"], window=14).rsi()
-    out["atr14"] = AverageTrueRange(high=out["high"], low=out["low"], close=out["close"], window=14).average_true_range()
+    key = (symbol, timeframe) if symbol and timeframe else None
+    times = out["time"].to_numpy(dtype="datetime64[ns]").view("int64") if key else None
+    ema_fast, ema_slow, rsi = _ema_rsi(out["close"].to_numpy(dtype=np.float64), times, key)
+    out["ema50"] = ema_fast
+    out["ema200"] = ema_slow
+    out["rsi14"] = rsi
+    out["atr14"] = _atr(
+        out["high"].to_numpy(dtype=np.float64),
+        out["low"].to_numpy(dtype=np.float64),
+        out["close"].to_numpy(dtype=np.float64),
+    )
 
     # Volume features (tick volume)
-    out["vol_sma20"] = out["volume"].rolling(20).mean()
-    vol_mean = out["volume"].rolling(20).mean()
-    vol_std = out["volume"].rolling(20).std(ddof=0)
-    out["vol_z20"] = (out["volume"] - vol_mean) / vol_std.replace(0, np.nan)
+    vol = out["volume"].to_numpy(dtype=np.float64)
+    vol_mean, vol_std = _rolling_mean_std(vol, 20)
+    vol_std[vol_std == 0] = np.nan
+    out["vol_sma20"] = vol_mean
+    out["vol_z20"] = (vol - vol_mean) / vol_std
 
+    _MEMO.put(memo_key, {col: out[col].to_numpy().copy() for col in _OUT_COLS})
     return out
 
 
+def warmup_kernels(n: int = 100) -> None:
+    """
+    Compile semua kernel numba (EMA/RSI, ATR, rolling vol) pakai frame dummy,
+    biar tick pertama tidak kena JIT latency. Tanpa symbol -> state cache tidak disentuh.
+    """
+    x = 100.0 + np.cumsum(np.ones(n))
+    df = pd.DataFrame({
+        "time": pd.date_range("2000-01-01", periods=n, freq="min", tz="UTC"),
+        "open": x,
+        "high": x + 1.0,
+        "low": x - 1.0,
+        "close": x + 0.5,
+        "volume": np.arange(n, dtype=np.float64),
+    })
+    add_indicators(df)
+
+
 def last_indicator_snapshot(df: pd.DataFrame) -> dict:
     """
     Returns last-bar snapshot (safe casting).
@@ -1,88 +1,113 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
+from app.analysis.frame_memo import FrameMemo, frame_key
 
-def _prev_swing_levels(df: pd.DataFrame, n: int = 50) -> Dict[str, float]:
+_MEMO = FrameMemo(maxsize=8)
+
+
+def _prev_levels(h: np.ndarray, l: np.ndarray, end: int, n: int) -> Tuple[float, float]:
     """
-    Simple liquidity reference levels: recent high/low excluding last bar.
+    Simple liquidity reference levels: high/low of the n bars before `end`
+    (end = negative offset, e.g. -1 = exclude last bar).
     """
-    window = df.iloc[-(n+1):-1] if len(df) > n+1 else df.iloc[:-1]
-    if len(window) < 5:
-        return {"prev_high": 0.0, "prev_low": 0.0}
-    return {
-        "prev_high": float(window["high"].max()),
-        "prev_low": float(window["low"].min()),
-    }
+    if n < 5:
+        return 0.0, 0.0
+    return float(h[end - n:end].max()), float(l[end - n:end].min())
 
 
-def detect_liquidity_sweep(df: pd.DataFrame, lookback: int = 50, wick_ratio: float = 0.55) -> Dict[str, Optional[str]]:
+def detect_liquidity(df: pd.DataFrame, lookback: int = 50, wick_ratio: float = 0.55) -> Dict[str, Optional[str]]:
     """
-    Detect liquidity sweep / stop hunt on last candle:
+    Liquidity sweep + fake breakout in one pass (shared high/low arrays).
+
+    Sweep (last candle):
       - Sweeps above prev_high then closes back below it => 'SWEEP_HIGH'
       - Sweeps below prev_low then closes back above it => 'SWEEP_LOW'
+      wick_ratio ensures wick dominance to reduce false signals.
+
+    Fake breakout (last 2 candles, levels exclude those 2):
+      - Close breaks level then next close returns inside range.
 
-    wick_ratio ensures wick dominance to reduce false signals.
     Returns dict:
       {
         "sweep": "SWEEP_HIGH" | "SWEEP_LOW" | None,
-        "level": float,
-        "notes": str
+        "level": float | None,
+        "notes": str,
+        "fake": "FAKE_UP" | "FAKE_DOWN" | None,
+        "fake_level": float | None
       }
+    Memoized on frame content + params.
     """
-    if len(df) < lookback + 5:
-        return {"sweep": None, "level": None, "notes": "insufficient_bars"}
+    key = frame_key(df, ("time", "open", "high", "low", "close"), lookback, wick_ratio)
+    cached = _MEMO.get(key)
+    if cached is not None:
+        return cached
 
-    levels = _prev_swing_levels(df, n=lookback)
-    prev_high = levels["prev_high"]
-    prev_low = levels["prev_low"]
+    out = {"sweep": None, "level": None, "notes": "none", "fake": None, "fake_level": None}
 
-    last = df.iloc[-1]
-    o, h, l, c = float(last["open"]), float(last["high"]), float(last["low"]), float(last["close"])
+    n = len(df)
+    if n < lookback + 5:
+        out["notes"] = "insufficient_bars"
+        _MEMO.put(key, out)
+        return out
 
-    rng = max(h - l, 1e-9)
-    upper_wick = h - max(o, c)
-    lower_wick = min(o, c) - l
+    o = df["open"].to_numpy(dtype=float)
+    h = df["high"].to_numpy(dtype=float)
+    l = df["low"].to_numpy(dtype=float)
+    c = df["close"].to_numpy(dtype=float)
+
+    # --- Sweep ---
+    prev_high, prev_low = _prev_levels(h, l, -1, lookback)
+    lo, lh, ll, lc = o[-1], h[-1], l[-1], c[-1]
+
+    rng = max(lh - ll, 1e-9)
+    upper_wick = lh - max(lo, lc)
+    lower_wick = min(lo, lc) - ll
 
     # Sweep high: break above, close back below
-    if prev_high > 0 and h > prev_high and c < prev_high:
-        if upper_wick / rng >= wick_ratio:
-            return {"sweep": "SWEEP_HIGH", "level": prev_high, "notes": "wick_dominant"}
-        return {"sweep": "SWEEP_HIGH", "level": prev_high, "notes": "weak_wick"}
+    if prev_high > 0 and lh > prev_high and lc < prev_high:
+        out["sweep"], out["level"] = "SWEEP_HIGH", prev_high
+        out["notes"] = "wick_dominant" if upper_wick / rng >= wick_ratio else "weak_wick"
 
     # Sweep low: break below, close back above
-    if prev_low > 0 and l < prev_low and c > prev_low:
-        if lower_wick / rng >= wick_ratio:
-            return {"sweep": "SWEEP_LOW", "level": prev_low, "notes": "wick_dominant"}
-        return {"sweep": "SWEEP_LOW", "level": prev_low, "notes": "weak_wick"}
+    elif prev_low > 0 and ll < prev_low and lc > prev_low:
+        out["sweep"], out["level"] = "SWEEP_LOW", prev_low
+        out["notes"] = "wick_dominant" if lower_wick / rng >= wick_ratio else "weak_wick"
 
-    return {"sweep": None, "level": None, "notes": "none"}
+    # --- Fake breakout ---
+    if n < lookback + 10:
+        _MEMO.put(key, out)
+        return out
 
+    prev_high, prev_low = _prev_levels(h, l, -3, lookback)  # exclude last 2 candles
+    c1, c2 = float(c[-2]), float(c[-1])
 
-def detect_fake_breakout(df: pd.DataFrame, lookback: int = 50) -> Dict[str, Optional[str]]:
-    """
-    Fake breakout heuristic:
-      - Close breaks level then next close returns inside range.
-    We detect only for last 2 candles.
+    # Fake up: candle-1 closes above prev_high, candle-2 closes back below
+    if prev_high > 0 and c1 > prev_high and c2 < prev_high:
+        out["fake"], out["fake_level"] = "FAKE_UP", prev_high
 
-    Returns:
-      { "fake": "FAKE_UP" | "FAKE_DOWN" | None, "level": float | None }
-    """
-    if len(df) < lookback + 10:
-        return {"fake": None, "level": None}
+    # Fake down: candle-1 closes below prev_low, candle-2 closes back above
+    elif prev_low > 0 and c1 < prev_low and c2 > prev_low:
+        out["fake"], out["fake_level"] = "FAKE_DOWN", prev_low
 
-    levels = _prev_swing_levels(df.iloc[:-2], n=lookback)  # exclude last 2 candles
-    prev_high = levels["prev_high"]
-    prev_low = levels["prev_low"]
+    _MEMO.put(key, out)
+    return out
 
-    c1 = float(df["close"].iloc[-2])
-    c2 = float(df["close"].iloc[-1])
 
-    # Fake up: candle-1 closes above prev_high, candle-2 closes back below
-    if prev_high > 0 and c1 > prev_high and c2 < prev_high:
-        return {"fake": "FAKE_UP", "level": prev_high}
+def detect_liquidity_sweep(df: pd.DataFrame, lookback: int = 50, wick_ratio: float = 0.55) -> Dict[str, Optional[str]]:
+    """
+    Sweep-only view of detect_liquidity().
+    Returns { "sweep": ..., "level": ..., "notes": ... }
+    """
+    liq = detect_liquidity(df, lookback=lookback, wick_ratio=wick_ratio)
+    return {"sweep": liq["sweep"], "level": liq["level"], "notes": liq["notes"]}
 
-    # Fake down: candle-1 closes below prev_low, candle-2 closes back above
-    if prev_low > 0 and c1 < prev_low and c2 > prev_low:
-        return {"fake": "FAKE_DOWN", "level": prev_low}
 
-    return {"fake": None, "level": None}
+def detect_fake_breakout(df: pd.DataFrame, lookback: int = 50) -> Dict[str, Optional[str]]:
+    """
+    Fake-breakout-only view of detect_liquidity().
+    Returns { "fake": "FAKE_UP" | "FAKE_DOWN" | None, "level": float | None }
+    """
+    liq = detect_liquidity(df, lookback=lookback)
+    return {"fake": liq["fake"], "level": liq["fake_level"]}
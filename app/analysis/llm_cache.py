@@ -0,0 +1,43 @@
+import hashlib
+import time
+from typing import Dict, Optional, Tuple
+
+# key (blake2b digest) -> (monotonic ts, narrative text)
+_LLM_CACHE: Dict[bytes, Tuple[float, str]] = {}
+
+
+def zones_signature(zones: dict) -> tuple:
+    """
+    Compact, hashable view of DEMAND/SUPPLY zones (rounded to 2 decimals).
+    """
+    sig = []
+    for name in ("DEMAND", "SUPPLY"):
+        z = zones.get(name) if zones else None
+        sig.append((round(float(z["low"]), 2), round(float(z["high"]), 2)) if z else None)
+    return tuple(sig)
+
+
+def feature_key(*parts) -> bytes:
+    """
+    Hash quantized features -> cache key.
+    """
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).digest()
+
+
+def cache_get(key: bytes, ttl: float) -> Optional[str]:
+    hit = _LLM_CACHE.get(key)
+    if hit is None:
+        return None
+    ts, text = hit
+    if time.monotonic() - ts > ttl:
+        _LLM_CACHE.pop(key, None)
+        return None
+    return text
+
+
+def cache_put(key: bytes, text: str, ttl: float) -> None:
+    now = time.monotonic()
+    # Buang entry expired biar dict gak numpuk di daemon yang jalan berhari-hari
+    for k in [k for k, (ts, _) in _LLM_CACHE.items() if now - ts > ttl]:
+        del _LLM_CACHE[k]
+    _LLM_CACHE[key] = (now, text)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class MultiTFView:
+    """
+    Beberapa TF ditumpuk jadi satu SoA: tiap field shape (n_tf, n_bars).
+    Baris ke-t = timeframe tfs[t]. Kernel numba bisa prange per TF.
+    Cuma high/low (yang dibaca fractals_multitf).
+    """
+    tfs: Tuple[str, ...]
+    high: np.ndarray
+    low: np.ndarray
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], dtype=None) -> Optional["MultiTFView"]:
+        """
+        Stack high/low frames. dtype None -> dtype kolom frame (float32 kalau
+        USE_FLOAT32), jadi tanpa konversi. Returns None kalau jumlah bar beda
+        antar TF (caller fallback ke jalur per-frame).
+        """
+        tfs = tuple(frames)
+        if not tfs:
+            return None
+        n = len(frames[tfs[0]])
+        if any(len(frames[tf]) != n for tf in tfs):
+            return None
+        if dtype is None:
+            dtype = frames[tfs[0]]["high"].dtype
+
+        def stack(col: str) -> np.ndarray:
+            out = np.empty((len(tfs), n), dtype=dtype)
+            for t, tf in enumerate(tfs):
+                out[t] = frames[tf][col].to_numpy(dtype=dtype)
+            return out
+
+        return cls(tfs=tfs, high=stack("high"), low=stack("low"))
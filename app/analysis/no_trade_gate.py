@@ -1,5 +1,15 @@
 from typing import Dict, Tuple
 
+# Fail bits, urut sesuai prioritas reason
+_F_CONFLICT = 1
+_F_RANGING = 2
+_F_CHOCH = 4
+_F_ATR = 8
+_F_VOL = 16
+
+_VOL_TFS = ("M15", "H1")
+_DEAD_VOL_Z = -3.0
+
 def no_trade_gate(
     tf_results: Dict[str, Dict],
     min_atr_map: Dict[str, float],
@@ -23,31 +33,46 @@ def no_trade_gate(
     if not h1 or not h4:
         return False, "HTF data missing"
 
-    if h1["bias"] != h4["bias"]:
-        return False, f"HTF conflict (H1={h1['bias']} vs H4={h4['bias']})"
+    # Tarik semua field sekali ke locals -> satu bitmask, tanpa if-chain di happy path
+    h1_bias, h4_bias = h1["bias"], h4["bias"]
+    h1_event, h4_event = h1["event"], h4["event"]
+    atr_checks = tuple(
+        (tf, tf_results[tf]["atr"], min_atr)
+        for tf, min_atr in min_atr_map.items()
+        if tf_results.get(tf)
+    )
+    vol_checks = tuple((tf, tf_results[tf]["vol_z"]) for tf in _VOL_TFS if tf_results.get(tf))
+
+    atr_fail = any(atr < min_atr for _, atr, min_atr in atr_checks)
+    vol_fail = any(vz < _DEAD_VOL_Z for _, vz in vol_checks)
+
+    fail_mask = (
+        (h1_bias != h4_bias) * _F_CONFLICT
+        | (h1_bias == "RANGING") * _F_RANGING
+        | (h1_event == "CHoCH" or h4_event == "CHoCH") * _F_CHOCH
+        | atr_fail * _F_ATR
+        | vol_fail * _F_VOL
+    )
+    if not fail_mask:
+        return True, "Market OK"
+
+    # Reason: bit terendah = cek paling awal (urutan sama seperti sebelumnya)
+    if fail_mask & _F_CONFLICT:
+        return False, f"HTF conflict (H1={h1_bias} vs H4={h4_bias})"
 
-    if h1["bias"] == "RANGING":
+    if fail_mask & _F_RANGING:
         return False, "HTF ranging"
 
     # 2) CHoCH on HTF = unstable
-    if h1["event"] == "CHoCH" or h4["event"] == "CHoCH":
+    if fail_mask & _F_CHOCH:
         return False, "HTF CHoCH detected"
 
     # 3) ATR filter (avoid chop)
-    for tf, min_atr in min_atr_map.items():
-        tf_data = tf_results.get(tf)
-        if not tf_data:
-            continue
-        if tf_data["atr"] < min_atr:
-            return False, f"Low ATR on {tf}"
+    if fail_mask & _F_ATR:
+        tf = next(tf for tf, atr, min_atr in atr_checks if atr < min_atr)
+        return False, f"Low ATR on {tf}"
 
     # 4) Volume sanity (tick volume z-score)
     # Too negative = dead market
-    for tf in ["M15", "H1"]:
-        tf_data = tf_results.get(tf)
-        if not tf_data:
-            continue
-        if tf_data["vol_z"] < -3.0:
-            return False, f"Dead volume on {tf}"
-
-    return True, "Market OK"
+    tf = next(tf for tf, vz in vol_checks if vz < _DEAD_VOL_Z)
+    return False, f"Dead volume on {tf}"
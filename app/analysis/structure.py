@@ -1,44 +1,129 @@
+import numpy as np
 import pandas as pd
-from typing import Literal, Dict, Optional
+from typing import Literal, Dict, Optional, Tuple
+
+from app._njit import njit, prange
+from app.analysis.frame_memo import FrameMemo, frame_key
+from app.analysis.multitf import MultiTFView
 
 StructureBias = Literal["BULLISH", "BEARISH", "RANGING"]
 StructureEvent = Literal["BOS", "CHoCH", "NONE"]
 
+@njit(cache=True, fastmath=True)
+def _fractal_mask(high, low, lookback):
+    """
+    Fractal swing mask in one O(N) pass.
+    Sliding max/min pakai monotonic deque (index buffer preallocated),
+    jadi tidak perlu scan ulang window tiap bar.
+    """
+    n = high.shape[0]
+    window = 2 * lookback + 1
+    swing_high = np.zeros(n, dtype=np.bool_)
+    swing_low = np.zeros(n, dtype=np.bool_)
+    if n < window:
+        return swing_high, swing_low
+
+    dq_h = np.empty(n, dtype=np.int64)
+    dq_l = np.empty(n, dtype=np.int64)
+    h_head = 0
+    h_tail = 0
+    l_head = 0
+    l_tail = 0
+
+    for j in range(n):
+        # Buang kandidat yang sudah kalah dominan
+        while h_tail > h_head and high[dq_h[h_tail - 1]] <= high[j]:
+            h_tail -= 1
+        dq_h[h_tail] = j
+        h_tail += 1
+        if dq_h[h_head] <= j - window:
+            h_head += 1
+
+        while l_tail > l_head and low[dq_l[l_tail - 1]] >= low[j]:
+            l_tail -= 1
+        dq_l[l_tail] = j
+        l_tail += 1
+        if dq_l[l_head] <= j - window:
+            l_head += 1
+
+        if j >= window - 1:
+            i = j - lookback
+            # Fractal High/Low: bar tengah = max/min dari n candle kiri kanan
+            swing_high[i] = high[i] == high[dq_h[h_head]]
+            swing_low[i] = low[i] == low[dq_l[l_head]]
+
+    return swing_high, swing_low
+
+
+@njit(cache=True, parallel=True)
+def fractals_multitf(high, low, lookback):
+    """
+    _fractal_mask untuk semua TF sekaligus: high/low shape (n_tf, n_bars),
+    satu TF per core via prange.
+    """
+    n_tf, n = high.shape
+    swing_high = np.zeros((n_tf, n), dtype=np.bool_)
+    swing_low = np.zeros((n_tf, n), dtype=np.bool_)
+    for t in prange(n_tf):
+        sh, sl = _fractal_mask(high[t], low[t], lookback)
+        swing_high[t] = sh
+        swing_low[t] = sl
+    return swing_high, swing_low
+
+
+# Warm-up sekali saat import biar tick pertama tidak kena compile latency
+_fractal_mask(np.zeros(10), np.zeros(10), 3)
+fractals_multitf(np.zeros((2, 10)), np.zeros((2, 10)), 3)
+fractals_multitf(np.zeros((2, 10), dtype=np.float32), np.zeros((2, 10), dtype=np.float32), 3)  # USE_FLOAT32
+
+
 def detect_swings(df: pd.DataFrame, lookback: int = 3) -> pd.DataFrame:
     """
     Mark swing highs/lows using fractal-style logic.
-    Adds columns:
+    Adds columns IN PLACE (no copy) and returns the same frame:
       - swing_high (bool)
       - swing_low (bool)
     """
-    out = df.copy()
-    out["swing_high"] = False
-    out["swing_low"] = False
+    out = df
+    swing_high, swing_low = _fractal_mask(
+        out["high"].to_numpy(dtype=np.float64),
+        out["low"].to_numpy(dtype=np.float64),
+        lookback,
+    )
+    out["swing_high"] = swing_high
+    out["swing_low"] = swing_low
 
-    for i in range(lookback, len(out) - lookback):
-        current_high = out["high"].iloc[i]
-        current_low = out["low"].iloc[i]
+    return out
 
-        # Fractal High: High ditengah lebih tinggi dari n candle kiri kanan
-        if current_high == max(out["high"].iloc[i - lookback : i + lookback + 1]):
-            out.at[out.index[i], "swing_high"] = True
 
-        # Fractal Low: Low ditengah lebih rendah dari n candle kiri kanan
-        if current_low == min(out["low"].iloc[i - lookback : i + lookback + 1]):
-            out.at[out.index[i], "swing_low"] = True
+def detect_swings_multi(frames: Dict[str, pd.DataFrame], lookback: int = 3) -> Dict[str, pd.DataFrame]:
+    """
+    detect_swings untuk beberapa TF dalam satu kernel call (MultiTFView + prange).
+    Kolom swing_high/swing_low ditulis IN PLACE ke tiap frame.
+    Kalau jumlah bar beda antar TF -> fallback per frame.
+    """
+    view = MultiTFView.from_frames(frames)
+    if view is None:
+        for df in frames.values():
+            detect_swings(df, lookback=lookback)
+        return frames
 
-    return out
+    swing_high, swing_low = fractals_multitf(view.high, view.low, lookback)
+    for t, tf in enumerate(view.tfs):
+        frames[tf]["swing_high"] = swing_high[t]
+        frames[tf]["swing_low"] = swing_low[t]
+    return frames
 
 
 def extract_last_swings(df: pd.DataFrame) -> Dict[str, float]:
     """
     Get last confirmed swing high & low prices.
     """
-    swings_high = df[df["swing_high"]]
-    swings_low = df[df["swing_low"]]
+    idx_high = np.flatnonzero(df["swing_high"].to_numpy())
+    idx_low = np.flatnonzero(df["swing_low"].to_numpy())
 
-    last_high = float(swings_high["high"].iloc[-1]) if len(swings_high) > 0 else 0.0
-    last_low = float(swings_low["low"].iloc[-1]) if len(swings_low) > 0 else 0.0
+    last_high = float(df["high"].to_numpy()[idx_high[-1]]) if idx_high.size else 0.0
+    last_low = float(df["low"].to_numpy()[idx_low[-1]]) if idx_low.size else 0.0
 
     return {
         "last_swing_high": last_high,
@@ -46,65 +131,95 @@ def extract_last_swings(df: pd.DataFrame) -> Dict[str, float]:
     }
 
 
-def analyze_structure(df: pd.DataFrame) -> Dict[str, str]:
-    """
-    Determine structure bias and event (BOS / CHoCH).
-    IMPROVED: Uses EMA context to resolve 'RANGING' conditions during trends.
-    """
-    # 1. Detect Fractals
-    df = detect_swings(df, lookback=3) 
-
-    swings = extract_last_swings(df)
-    last_high = swings["last_swing_high"]
-    last_low = swings["last_swing_low"]
+# Bit flags untuk tabel state
+_BREAK_HIGH = 1   # close > last swing high
+_BREAK_LOW = 2    # close < last swing low
+_EMA_BULL = 4     # Price > EMA50 > EMA200
+_EMA_BEAR = 8     # Price < EMA50 < EMA200
 
-    close = float(df["close"].iloc[-1])
-    
-    # Ambil data EMA (pastikan add_indicators sudah dijalankan di main.py)
-    ema50 = float(df["ema50"].iloc[-1]) if "ema50" in df.columns else 0.0
-    ema200 = float(df["ema200"].iloc[-1]) if "ema200" in df.columns else 0.0
 
+def _resolve_state(mask: int) -> Tuple[StructureBias, StructureEvent]:
+    """
+    Rule ladder (dievaluasi sekali per kombinasi flag saat import).
+    """
     bias: StructureBias = "RANGING"
     event: StructureEvent = "NONE"
 
     # 2. Pure Structure Logic (Fractal Breakout)
-    if last_high > 0 and close > last_high:
-        bias = "BULLISH"
-        event = "BOS"
-
-    elif last_low > 0 and close < last_low:
-        bias = "BEARISH"
-        event = "BOS"
+    if mask & _BREAK_HIGH:
+        bias, event = "BULLISH", "BOS"
+    elif mask & _BREAK_LOW:
+        bias, event = "BEARISH", "BOS"
 
     # CHoCH logic (Change of Character) - Reversal Detection
     # Bullish tapi jebol Low -> Bearish
-    if bias == "BULLISH" and last_low > 0 and close < last_low:
-        bias = "BEARISH"
-        event = "CHoCH"
-    
+    if bias == "BULLISH" and mask & _BREAK_LOW:
+        bias, event = "BEARISH", "CHoCH"
+
     # Bearish tapi jebol High -> Bullish
-    if bias == "BEARISH" and last_high > 0 and close > last_high:
-        bias = "BULLISH"
-        event = "CHoCH"
+    if bias == "BEARISH" and mask & _BREAK_HIGH:
+        bias, event = "BULLISH", "CHoCH"
 
     # 3. EMA Context / Trend Continuation Logic (The "Smart" Fix)
     # Jika struktur bilang RANGING (karena belum break high/low baru),
     # tapi harga trending kuat di atas/bawah EMA, kita override jadi trending.
+    # Event tetap NONE karena ini bukan BOS struktural, tapi validasi tren
     if bias == "RANGING":
-        if ema50 > 0 and ema200 > 0:
-            # Bullish Context: Price > EMA50 > EMA200
-            if close > ema50 and ema50 > ema200:
-                bias = "BULLISH"
-                # Event tetap NONE karena ini bukan BOS struktural, tapi validasi tren
-            
-            # Bearish Context: Price < EMA50 < EMA200
-            elif close < ema50 and ema50 < ema200:
-                bias = "BEARISH"
-                # Event tetap NONE
+        if mask & _EMA_BULL:
+            bias = "BULLISH"
+        elif mask & _EMA_BEAR:
+            bias = "BEARISH"
 
-    return {
+    return bias, event
+
+
+_STATE_TABLE = {mask: _resolve_state(mask) for mask in range(16)}
+
+# Hasil analyze_structure per isi frame (tick tanpa perubahan data = gratis)
+_MEMO = FrameMemo(maxsize=8)
+
+
+def analyze_structure(df: pd.DataFrame, swings_ready: bool = False) -> Dict[str, str]:
+    """
+    Determine structure bias and event (BOS / CHoCH).
+    IMPROVED: Uses EMA context to resolve 'RANGING' conditions during trends.
+    Memoized on frame content (same bars + EMA -> cached result).
+    swings_ready=True: swing_high/swing_low sudah diisi (detect_swings_multi).
+    """
+    key = frame_key(df, ("time", "high", "low", "close", "ema50", "ema200"))
+    cached = _MEMO.get(key)
+    if cached is not None:
+        return cached
+
+    # 1. Detect Fractals
+    if not swings_ready:
+        df = detect_swings(df, lookback=3)
+
+    swings = extract_last_swings(df)
+    last_high = swings["last_swing_high"]
+    last_low = swings["last_swing_low"]
+
+    close = float(df["close"].iloc[-1])
+    
+    # Ambil data EMA (pastikan add_indicators sudah dijalankan di main.py)
+    ema50 = float(df["ema50"].iloc[-1]) if "ema50" in df.columns else 0.0
+    ema200 = float(df["ema200"].iloc[-1]) if "ema200" in df.columns else 0.0
+
+    # Semua perbandingan dihitung sekali, lalu di-dispatch lewat tabel
+    ema_ok = ema50 > 0 and ema200 > 0
+    mask = (
+        (last_high > 0 and close > last_high)
+        | (last_low > 0 and close < last_low) << 1
+        | (ema_ok and close > ema50 and ema50 > ema200) << 2
+        | (ema_ok and close < ema50 and ema50 < ema200) << 3
+    )
+    bias, event = _STATE_TABLE[mask]
+
+    result = {
         "bias": bias,
         "event": event,
         "last_swing_high": f"{last_high:.2f}" if last_high else "-",
         "last_swing_low": f"{last_low:.2f}" if last_low else "-",
-    }
\ No newline at end of file
+    }
+    _MEMO.put(key, result)
+    return result
\ No newline at end of file
@@ -1,8 +1,19 @@
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Dict, Literal, Optional
 
+from app.analysis.frame_memo import FrameMemo, frame_key
+
+try:
+    import numexpr as ne
+except ImportError:  # pragma: no cover - numexpr optional, fallback numpy
+    ne = None
+
 ZoneType = Literal["SUPPLY", "DEMAND"]
 
+_MEMO = FrameMemo(maxsize=8)
+
 def detect_zones(
     df: pd.DataFrame,
     impulse_pct: float = 0.6,
@@ -18,48 +29,77 @@ def detect_zones(
         "SUPPLY": {high, low, time} | None
         "DEMAND": {high, low, time} | None
       }
+    Memoized on frame content + params.
     """
+    key = None
+    if len(df):
+        key = frame_key(
+            df, ("time", "open", "high", "low", "close"),
+            impulse_pct, base_candles, df.index[0], df.index[-1],
+        )
+    cached = _MEMO.get(key)
+    if cached is not None:
+        return cached
 
     out = {
         "SUPPLY": None,
         "DEMAND": None
     }
 
-    df = df.copy()
-    df["body"] = (df["close"] - df["open"]).abs()
-    df["range"] = (df["high"] - df["low"]).replace(0, 1e-9)
-    df["body_ratio"] = df["body"] / df["range"]
-
-    # scan from older → recent
-    for i in range(base_candles + 2, len(df) - 1):
-        base = df.iloc[i - base_candles:i]
-        impulse = df.iloc[i]
-
-        # Base candles = small bodies
-        if (base["body_ratio"] < 0.35).all():
-
-            # Bullish impulse → DEMAND
-            if impulse["close"] > impulse["open"]:
-                move_pct = (impulse["close"] - impulse["open"]) / impulse["range"]
-                if move_pct >= impulse_pct:
-                    zone_low = base["low"].min()
-                    zone_high = base["high"].max()
-                    out["DEMAND"] = {
-                        "low": float(zone_low),
-                        "high": float(zone_high),
-                        "time": base.index[-1]
-                    }
-
-            # Bearish impulse → SUPPLY
-            if impulse["close"] < impulse["open"]:
-                move_pct = (impulse["open"] - impulse["close"]) / impulse["range"]
-                if move_pct >= impulse_pct:
-                    zone_low = base["low"].min()
-                    zone_high = base["high"].max()
-                    out["SUPPLY"] = {
-                        "low": float(zone_low),
-                        "high": float(zone_high),
-                        "time": base.index[-1]
-                    }
+    n = len(df)
+    first = base_candles + 2  # impulse index pertama yang di-scan
+    if n - 1 <= first:
+        _MEMO.put(key, out)
+        return out
+
+    o = df["open"].to_numpy(dtype=float)
+    h = df["high"].to_numpy(dtype=float)
+    l = df["low"].to_numpy(dtype=float)
+    c = df["close"].to_numpy(dtype=float)
+
+    if ne is not None:
+        # Satu pass fused, tanpa array temporary
+        local = {"c": c, "o": o, "h": h, "l": l}
+        rng = ne.evaluate("where(h - l == 0, 1e-9, h - l)", local_dict=local)
+        local["r"] = rng
+        body_ratio = ne.evaluate("abs(c - o) / r", local_dict=local)
+        move_all = ne.evaluate("(c - o) / r", local_dict=local)
+    else:
+        rng = h - l
+        rng = np.where(rng == 0, 1e-9, rng)
+        body_ratio = np.abs(c - o) / rng
+        move_all = (c - o) / rng
+
+    # Impulse candle i (bar terakhir/forming tidak dihitung), base = i-base_candles .. i-1
+    i = np.arange(first, n - 1)
+    start = i - base_candles
+
+    # Base candles = small bodies
+    base_ok = (sliding_window_view(body_ratio, base_candles) < 0.35).all(axis=1)[start]
+    base_low = sliding_window_view(l, base_candles).min(axis=1)[start]
+    base_high = sliding_window_view(h, base_candles).max(axis=1)[start]
+
+    move = move_all[i]
+
+    # Bullish impulse → DEMAND, Bearish impulse → SUPPLY (ambil yang paling baru)
+    demand_idx = np.flatnonzero(base_ok & (c[i] > o[i]) & (move >= impulse_pct))
+    supply_idx = np.flatnonzero(base_ok & (c[i] < o[i]) & (-move >= impulse_pct))
+
+    if demand_idx.size:
+        k = demand_idx[-1]
+        out["DEMAND"] = {
+            "low": float(base_low[k]),
+            "high": float(base_high[k]),
+            "time": df.index[i[k] - 1]
+        }
+
+    if supply_idx.size:
+        k = supply_idx[-1]
+        out["SUPPLY"] = {
+            "low": float(base_low[k]),
+            "high": float(base_high[k]),
+            "time": df.index[i[k] - 1]
+        }
 
+    _MEMO.put(key, out)
     return out
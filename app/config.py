@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import os
+from functools import cached_property
 from pathlib import Path
 from typing import Optional
 
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 # =========================================================
@@ -52,6 +53,9 @@ def _get_bool(key: str, default: bool = False) -> bool:
 
 
 class Settings(BaseModel):
+    # Read-only setelah load (.env dibaca sekali saat start)
+    model_config = ConfigDict(frozen=True)
+
     # =====================================================
     # ENGINE CORE
     # =====================================================
@@ -97,6 +101,13 @@ class Settings(BaseModel):
     max_daily_drawdown_pct: float = _get_float("MAX_DAILY_DRAWDOWN_PCT", 3.0)
     max_open_trades: int = _get_int("MAX_OPEN_TRADES", 3)
 
+    # =====================================================
+    # PERFORMANCE
+    # =====================================================
+    # OHLCV float32 di indicator pipeline (default off: BTC harga 6 digit
+    # kehilangan presisi di desimal ke-2)
+    use_float32: bool = _get_bool("USE_FLOAT32", False)
+
     # =====================================================
     # SWING MODE TUNING (Env-configurable, no hardcode)
     # =====================================================
@@ -128,6 +139,11 @@ class Settings(BaseModel):
     megallm_base_url: str = _get("MEGALLM_BASE_URL", "https://ai.megallm.io/v1")
     megallm_model: str = _get("MEGALLM_MODEL", "deepseek-ai/deepseek-v3.1") 
 
+    # Gemini (legacy / optional)
+    use_gemini: bool = _get_bool("USE_GEMINI", _get_bool("USE_GEMINI_FOR_SENTIMENT", False))  # .env lama cuma punya key ini
+    gemini_api_key: str = _get("GEMINI_API_KEY", "")
+    gemini_model: str = _get("GEMINI_MODEL", "gemini-1.5-flash")
+
     # =====================================================
     # VALIDATION
     # =====================================================
@@ -168,8 +184,8 @@ class Settings(BaseModel):
         if errors:
             raise RuntimeError("❌ CONFIG ERROR:\n- " + "\n- ".join(errors))
 
-    # Convenience computed dicts
-    @property
+    # Convenience computed dicts (frozen -> aman di-cache)
+    @cached_property
     def min_atr(self) -> dict:
         return {
             "M15": float(self.min_atr_m15),
@@ -1,21 +1,72 @@
 from __future__ import annotations
 
+import threading
+
 import MetaTrader5 as mt5
+import numpy as np
 import pandas as pd
 from datetime import timezone
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Final, List, Mapping
 
 from app.config import settings
 from app.data.models import FeedSnapshot, FeedStatus, MT5AccountInfo, MT5SymbolInfo, Timeframe
 
-TF_MAP: Dict[Timeframe, int] = {
+# Read-only (dibaca dari banyak worker thread, tidak boleh di-mutate)
+TF_MAP: Final[Mapping[Timeframe, int]] = MappingProxyType({
     "M1": mt5.TIMEFRAME_M1,
     "M5": mt5.TIMEFRAME_M5,
     "M15": mt5.TIMEFRAME_M15,
     "H1": mt5.TIMEFRAME_H1,
     "H4": mt5.TIMEFRAME_H4,
+})
+
+# Package MetaTrader5 tidak thread-safe: semua call IPC ke terminal diserialisasi.
+# Konversi ke DataFrame di luar lock, jadi tetap overlap antar thread.
+_MT5_LOCK = threading.Lock()
+
+
+# (field, cast, default) yang diambil dari struct account_info / symbol_info
+_ACCOUNT_FIELDS = (("login", int, 0), ("server", str, ""), ("name", str, ""), ("currency", str, ""))
+_SYMBOL_FIELDS = (("description", str, ""), ("digits", int, 0), ("point", float, 0.0), ("trade_mode", int, 0))
+
+
+def _snapshot(raw, spec) -> dict:
+    """
+    Struct MT5 (namedtuple) -> dict sekali via _asdict(), lalu cast per field.
+    """
+    d = raw._asdict()
+    return {k: cast(d.get(k, default)) for k, cast, default in spec}
+
+
+# TF yang diturunkan dari M1 (menit per bar). Cuma TF display (light);
+# M15 ke atas tetap fetch langsung (cache + fetch_since di engine)
+DERIVED_FROM_M1: Dict[Timeframe, int] = {
+    "M5": 5,
 }
 
+_OHLCV_AGG = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+
+
+def _resample(m1: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """
+    M1 -> bar N menit (label = waktu open bar, sama dengan MT5).
+    Menit tanpa tick tidak punya bar M1, bucket kosong dibuang.
+    Bucket pertama dibuang kalau M1 mulai di tengah bucket (parsial).
+    """
+    out = (
+        m1.set_index("time")
+        .resample(f"{minutes}min", label="left", closed="left")
+        .agg(_OHLCV_AGG)
+        .dropna(subset=["open"])
+        .reset_index()
+    )
+    if len(out) and out["time"].iloc[0] != m1["time"].iloc[0]:
+        out = out.iloc[1:]
+    out["volume"] = out["volume"].astype(m1["volume"].dtype)
+    return out
+
+
 class MT5Feed:
     def __init__(self, symbol: str):
         self.symbol = symbol
@@ -48,12 +99,7 @@ class MT5Feed:
         if acc is None:
             return FeedStatus(ok=False, reason="account_info() returned None (MT5 not logged in)")
 
-        account = MT5AccountInfo(
-            login=int(acc.login),
-            server=str(acc.server),
-            name=str(getattr(acc, "name", "")),
-            currency=str(getattr(acc, "currency", "")),
-        )
+        account = MT5AccountInfo(**_snapshot(acc, _ACCOUNT_FIELDS))
 
         # Ensure symbol exists & enabled
         if not mt5.symbol_select(self.symbol, True):
@@ -71,34 +117,90 @@ class MT5Feed:
                 account=account
             )
 
-        symbol_info = MT5SymbolInfo(
-            symbol=self.symbol,
-            description=str(getattr(info, "description", "")),
-            digits=int(getattr(info, "digits", 0)),
-            point=float(getattr(info, "point", 0.0)),
-            trade_mode=int(getattr(info, "trade_mode", 0)),
-        )
+        symbol_info = MT5SymbolInfo(symbol=self.symbol, **_snapshot(info, _SYMBOL_FIELDS))
 
         return FeedStatus(ok=True, reason="OK", account=account, symbol=symbol_info)
 
     def shutdown(self) -> None:
         mt5.shutdown()
 
-    def fetch_ohlcv(self, tf: Timeframe, n: int = 500) -> pd.DataFrame:
+    def _copy_rates(self, tf: Timeframe, start_pos: int, n: int) -> np.ndarray:
         timeframe = TF_MAP[tf]
-        rates = mt5.copy_rates_from_pos(self.symbol, timeframe, 0, n)
-        if rates is None or len(rates) == 0:
-            raise RuntimeError(f"No rates for {self.symbol} {tf}. last_error={mt5.last_error()}")
+        with _MT5_LOCK:
+            rates = mt5.copy_rates_from_pos(self.symbol, timeframe, start_pos, n)
+            if rates is None or len(rates) == 0:
+                raise RuntimeError(f"No rates for {self.symbol} {tf}. last_error={mt5.last_error()}")
+        return rates
+
+    @staticmethod
+    def _to_frame(rates: np.ndarray) -> pd.DataFrame:
+        # Kolom langsung dari field structured array (tanpa to_datetime / rename / reindex)
+        names = rates.dtype.names
+        time_idx = pd.DatetimeIndex(rates["time"].astype("datetime64[s]"), tz=timezone.utc)
+        if "tick_volume" in names:
+            volume = rates["tick_volume"]
+        elif "volume" in names:
+            volume = rates["volume"]
+        else:
+            volume = np.zeros(len(rates), dtype=np.int64)
+
+        # USE_FLOAT32: OHLC float32 + volume int32 (setengah memory traffic di semua pass hilir)
+        if settings.use_float32:
+            price_dtype = np.float32
+            volume = volume.astype(np.int32)
+        else:
+            price_dtype = np.float64
 
-        df = pd.DataFrame(rates)
-        df["time"] = pd.to_datetime(df["time"], unit="s", utc=True).dt.tz_convert(timezone.utc)
+        return pd.DataFrame({
+            "time": time_idx,
+            "open": rates["open"].astype(price_dtype, copy=False),
+            "high": rates["high"].astype(price_dtype, copy=False),
+            "low": rates["low"].astype(price_dtype, copy=False),
+            "close": rates["close"].astype(price_dtype, copy=False),
+            "volume": volume,
+        })
 
-        if "tick_volume" in df.columns:
-            df = df.rename(columns={"tick_volume": "volume"})
-        if "volume" not in df.columns:
-            df["volume"] = 0
+    def fetch_ohlcv(self, tf: Timeframe, n: int = 500) -> pd.DataFrame:
+        return self._to_frame(self._copy_rates(tf, 0, n))
 
-        return df[["time", "open", "high", "low", "close", "volume"]]
+    def fetch_since(self, tf: Timeframe, since: pd.Timestamp, n_max: int = 900, chunk: int = 8) -> pd.DataFrame:
+        """
+        Bar dengan time >= since saja (bar 'since' ikut, karena dulu masih forming).
+        Window kecil dulu (chunk), diperbesar x4 sampai bar 'since' tercakup atau n_max.
+        Kalau hasil tidak sampai ke 'since' (gap > n_max bar), caller harus full fetch.
+        """
+        since_s = int(since.timestamp())
+        n = chunk
+        while True:
+            rates = self._copy_rates(tf, 0, n)
+            if rates["time"][0] <= since_s or len(rates) < n or n >= n_max:
+                break
+            n = min(n * 4, n_max)
+        return self._to_frame(rates[rates["time"] >= since_s])
+
+    def fetch_ohlcv_many(self, tfs: List[Timeframe], n: Dict[Timeframe, int]) -> Dict[Timeframe, pd.DataFrame]:
+        """
+        Fetch beberapa TF dengan IPC seminimal mungkin: TF yang ada di DERIVED_FROM_M1
+        di-resample dari satu fetch M1 (cukup bar untuk semua), sisanya fetch langsung.
+        """
+        derive = [tf for tf in tfs if tf in DERIVED_FROM_M1]
+        direct = [tf for tf in tfs if tf not in derive]
+        if derive and "M1" not in direct:
+            direct.append("M1")
+
+        need = dict(n)
+        if derive:
+            # +1 bucket: bucket pertama bisa parsial lalu dibuang
+            need["M1"] = max([n.get("M1", 0)] + [(n[tf] + 1) * DERIVED_FROM_M1[tf] for tf in derive])
+
+        out: Dict[Timeframe, pd.DataFrame] = {tf: self.fetch_ohlcv(tf, need[tf]) for tf in direct}
+        m1 = out["M1"] if derive else None
+        for tf in derive:
+            out[tf] = _resample(m1, DERIVED_FROM_M1[tf]).tail(n[tf]).reset_index(drop=True)
+
+        if "M1" in out and "M1" in tfs:
+            out["M1"] = out["M1"].tail(n["M1"]).reset_index(drop=True)
+        return {tf: out[tf] for tf in tfs}
 
     def snapshot(self, tf: Timeframe, n: int = 300) -> FeedSnapshot:
         df = self.fetch_ohlcv(tf, n)
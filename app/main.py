@@ -1,26 +1,33 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import math
+import queue
+import threading
 import time
-from dataclasses import asdict
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Awaitable, Dict, Any, Optional, Tuple
+
+import pandas as pd
 
 from app.config import settings
 from app.data.mt5_feed import MT5Feed
 
-from app.analysis.indicators import add_indicators
-from app.analysis.structure import analyze_structure
+from app.analysis.indicators import add_indicators, warmup_kernels
+from app.analysis.structure import analyze_structure, detect_swings_multi
 from app.analysis.no_trade_gate import no_trade_gate
 from app.analysis.zones import detect_zones
-from app.analysis.liquidity import detect_liquidity_sweep, detect_fake_breakout
-from app.analysis.ai_megallm import analyze_market_with_megallm
+from app.analysis.liquidity import detect_liquidity
+from app.analysis.ai_megallm import analyze_market_with_megallm, aclose as close_ai_client
 
 from app.signal.entry_engine import build_trade_plan
 
 from app.notify.discord_bot import send_discord_embed, send_discord_embed_with_image
+from app.notify.session import close_session
 from app.visual.chart_renderer import render_swing_chart, RenderPlan
+from matplotlib.figure import Figure
 
 
 # =========================================================
@@ -28,6 +35,47 @@ from app.visual.chart_renderer import render_swing_chart, RenderPlan
 # =========================================================
 TIMEFRAMES = ["M1", "M5", "M15", "H1", "H4"]
 ZONE_TFS = ["M15", "H1", "H4"]
+# Cuma TF ini yang dibaca gate/plan -> full pipeline (indikator, struktur, zona)
+HEAVY_TFS = ["M15", "H1", "H4"]
+# M1/M5 cuma buat display: beberapa bar, tanpa analisa (M5 di-resample dari M1)
+LIGHT_TFS = [tf for tf in TIMEFRAMES if tf not in HEAVY_TFS]
+LIGHT_BARS = 10
+TF_BARS = 900
+
+
+# =========================================================
+# PUBLISH CONSTANTS (settings frozen -> cukup dihitung sekali)
+# =========================================================
+# Nama slot cache chart (PNG di-render ke memory, tidak ditulis ke disk)
+SIGNAL_CHART = "signal"
+WATCH_CHART = "watch"
+
+BUY_COLOR = 0x2ECC71
+SELL_COLOR = 0xE74C3C
+WATCH_COLOR = 0x34495E  # Dark Blue for Watch
+
+SIGNAL_TITLE = f"📌 {settings.symbol} — {{side}} SETUP"
+WATCH_TITLE = f"🛰️ MARKET WATCH — {settings.symbol}"
+WATCH_FOOTER = f"{{now}} | Next Check: {settings.watch_status_seconds}s"
+
+
+# =========================================================
+# LOGGING (engine loop cuma enqueue; write ke stdout di thread listener)
+# =========================================================
+log = logging.getLogger(__name__)
+
+
+def _setup_logging() -> QueueListener:
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    listener = QueueListener(q, stream)
+    listener.start()
+
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(q)]
+    root.setLevel(logging.INFO)
+    return listener
 
 
 # =========================================================
@@ -80,76 +128,203 @@ def _swing_gate(tf_results: dict) -> Tuple[bool, str]:
 def _format_trade_text(plan, ai_analysis: str = "") -> str:
     side = plan.side.upper()
     entry_lo, entry_hi = plan.entry_zone
-
-    lines = []
-    lines.append(f"**PAIR**: `{plan.symbol}`")
-    lines.append(f"**MODE**: `SWING` | **ENTRY TF**: `M15`")
-    lines.append("")
-    lines.append(f"**Market Bias**: `{plan.market_bias}` | **Side**: `{side}`")
-    lines.append("")
-    lines.append(f"**Entry Zone**: `{entry_lo:.2f} → {entry_hi:.2f}`")
-    lines.append(f"**Stop Loss**: `{plan.sl:.2f}`")
-    lines.append("")
-    lines.append("**Take Profit**")
-    lines.append(f"- TP1: `{plan.tp1:.2f}`")
-    lines.append(f"- TP2: `{plan.tp2:.2f}`")
-    lines.append(f"- TP3: `{plan.tp3:.2f}`")
-    lines.append("")
-    lines.append(f"**RR (to TP2)**: `{plan.rr:.2f}`")
-    lines.append(f"**Confidence**: `{plan.confidence:.1f}%`")
-    lines.append("")
-    
-    if ai_analysis and "Disabled" not in ai_analysis:
-        lines.append("🧠 **AI Analysis (DeepSeek V3)**")
-        lines.append(ai_analysis)
-        lines.append("")
-        
-    lines.append(f"**Technical Reason**: {plan.reason}")
-    return "\n".join(lines)
+    ai_block = (
+        f"🧠 **AI Analysis (DeepSeek V3)**\n{ai_analysis}\n\n"
+        if ai_analysis and "Disabled" not in ai_analysis else ""
+    )
+
+    return (
+        f"**PAIR**: `{plan.symbol}`\n"
+        f"**MODE**: `SWING` | **ENTRY TF**: `M15`\n"
+        f"\n"
+        f"**Market Bias**: `{plan.market_bias}` | **Side**: `{side}`\n"
+        f"\n"
+        f"**Entry Zone**: `{entry_lo:.2f} → {entry_hi:.2f}`\n"
+        f"**Stop Loss**: `{plan.sl:.2f}`\n"
+        f"\n"
+        f"**Take Profit**\n"
+        f"- TP1: `{plan.tp1:.2f}`\n"
+        f"- TP2: `{plan.tp2:.2f}`\n"
+        f"- TP3: `{plan.tp3:.2f}`\n"
+        f"\n"
+        f"**RR (to TP2)**: `{plan.rr:.2f}`\n"
+        f"**Confidence**: `{plan.confidence:.1f}%`\n"
+        f"\n"
+        f"{ai_block}"
+        f"**Technical Reason**: {plan.reason}"
+    )
 
 
 def _format_watch_report(symbol: str, tf_results: dict, zones_m15: dict, liq: dict, fake: dict, reason: str, ai_analysis: str = "") -> str:
-    lines = []
-    lines.append(f"**PAIR**: `{symbol}`")
-    lines.append(f"**MODE**: `SWING WATCH` | **STATUS**: `NO TRADE`")
-    lines.append("")
-    
     # AI Analysis di paling atas biar kebaca duluan
-    if ai_analysis and "Disabled" not in ai_analysis:
-        lines.append("🧠 **Market Insight (DeepSeek V3)**")
-        lines.append(ai_analysis)
-        lines.append("")
-
-    lines.append("**HTF STATUS**")
-    lines.append(f"- H4: `{tf_results['H4']['bias']}` | ATR `{tf_results['H4']['atr']:.2f}`")
-    lines.append(f"- H1: `{tf_results['H1']['bias']}` | ATR `{tf_results['H1']['atr']:.2f}`")
-    lines.append("")
-    lines.append("**ENTRY TF (M15)**")
-    lines.append(f"- M15: `{tf_results['M15']['bias']}` | Zones: `{_fmt_zones(zones_m15)}`")
-    lines.append("")
-    lines.append(f"🚫 **REASON**: {reason}")
-    return "\n".join(lines)
+    ai_block = (
+        f"🧠 **Market Insight (DeepSeek V3)**\n{ai_analysis}\n\n"
+        if ai_analysis and "Disabled" not in ai_analysis else ""
+    )
+    h4 = tf_results["H4"]
+    h1 = tf_results["H1"]
+
+    return (
+        f"**PAIR**: `{symbol}`\n"
+        f"**MODE**: `SWING WATCH` | **STATUS**: `NO TRADE`\n"
+        f"\n"
+        f"{ai_block}"
+        f"**HTF STATUS**\n"
+        f"- H4: `{h4['bias']}` | ATR `{h4['atr']:.2f}`\n"
+        f"- H1: `{h1['bias']}` | ATR `{h1['atr']:.2f}`\n"
+        f"\n"
+        f"**ENTRY TF (M15)**\n"
+        f"- M15: `{tf_results['M15']['bias']}` | Zones: `{_fmt_zones(zones_m15)}`\n"
+        f"\n"
+        f"🚫 **REASON**: {reason}"
+    )
 
 
 # =========================================================
 # PUBLISH HELPERS (cooldowns)
 # =========================================================
 class Cooldowns:
+    # monotonic: tidak loncat mundur saat jam sistem di-sync (NTP)
     def __init__(self):
-        self.last_signal_ts = 0.0
-        self.last_watch_ts = 0.0
+        self.last_signal_ts = -math.inf
+        self.last_watch_ts = -math.inf
+        # Narasi AI terakhir per (bar M15, context): bar belum close -> tidak call LLM lagi
+        self.last_ai_bar_ts = None
+        self.last_ai: Dict[str, str] = {}
 
     def can_signal(self) -> bool:
-        return (time.time() - self.last_signal_ts) >= settings.signal_cooldown_seconds
+        return (time.monotonic() - self.last_signal_ts) >= settings.signal_cooldown_seconds
 
     def can_watch(self) -> bool:
-        return (time.time() - self.last_watch_ts) >= settings.watch_status_seconds
+        return (time.monotonic() - self.last_watch_ts) >= settings.watch_status_seconds
 
     def mark_signal(self):
-        self.last_signal_ts = time.time()
+        self.last_signal_ts = time.monotonic()
 
     def mark_watch(self):
-        self.last_watch_ts = time.time()
+        self.last_watch_ts = time.monotonic()
+
+    def ai_cached(self, bar_ts, context: str) -> Optional[str]:
+        if bar_ts != self.last_ai_bar_ts:
+            return None
+        return self.last_ai.get(context)
+
+    def remember_ai(self, bar_ts, context: str, text: str):
+        if text.startswith("AI Analysis Failed"):
+            return  # error -> coba lagi tick berikutnya
+        if bar_ts != self.last_ai_bar_ts:
+            self.last_ai_bar_ts = bar_ts
+            self.last_ai.clear()
+        self.last_ai[context] = text
+
+
+async def _ai_narrative(cd: Cooldowns, bar_ts, context: str, **kwargs) -> str:
+    """
+    analyze_market_with_megallm, sekali per bar M15 per context.
+    """
+    cached = cd.ai_cached(bar_ts, context)
+    if cached is not None:
+        return cached
+    text = await analyze_market_with_megallm(context=context, **kwargs)
+    cd.remember_ai(bar_ts, context, text)
+    return text
+
+
+# =========================================================
+# CHART FIGURE CACHE (satu Figure dipakai ulang, tidak alloc per render)
+# =========================================================
+_FIG_CACHE: Dict[Tuple[float, float], Figure] = {}
+
+
+def get_cached_fig(figsize: Tuple[float, float] = (16, 9)) -> Figure:
+    fig = _FIG_CACHE.get(figsize)
+    if fig is None:
+        fig = _FIG_CACHE[figsize] = Figure(figsize=figsize)
+    return fig
+
+
+# Figure cache + rcParams pyplot tidak thread-safe: satu render pada satu waktu
+_RENDER_LOCK = threading.Lock()
+
+# slot -> (key render terakhir (bar terakhir, zones, plan), PNG bytes)
+_RENDER_CACHE: Dict[str, Tuple[tuple, bytes]] = {}
+
+
+def render_chart_cached(df: pd.DataFrame, zones: Dict[str, Any], plan: Optional[RenderPlan], slot: str, last_n: int) -> bytes:
+    """
+    Render chart ke PNG bytes; skip render_swing_chart kalau slot ini sudah
+    menggambar state yang sama. Key pakai record bar terakhir lengkap (bukan
+    cuma time) karena forming bar tetap bergerak.
+    """
+    # Per kolom (bukan df[cols].to_numpy(): campur datetime+float -> object array 900 baris)
+    last = tuple(df[c].to_numpy()[-1] for c in ("time", "open", "high", "low", "close"))
+    key = (last, last_n, repr(zones), repr(plan))
+    with _RENDER_LOCK:
+        hit = _RENDER_CACHE.get(slot)
+        if hit is not None and hit[0] == key:
+            return hit[1]
+
+        png = render_swing_chart(df, zones, plan, None, last_n, fig=get_cached_fig())
+        _RENDER_CACHE[slot] = (key, png)
+        return png
+
+
+# =========================================================
+# PER-TF PIPELINE (dipanggil via asyncio.to_thread)
+# =========================================================
+# tf -> (record bar terakhir, raw OHLCV, frame + indikator)
+_TF_CACHE: Dict[str, Tuple[tuple, pd.DataFrame, pd.DataFrame]] = {}
+
+
+def _fetch_tf(feed: MT5Feed, tf: str) -> Tuple[str, pd.DataFrame]:
+    """
+    Probe 1 bar dulu:
+    - record bar terakhir sama persis -> pakai frame cache (tanpa fetch 900 & tanpa analisa)
+    - waktu sama tapi OHLCV beda (forming bar jalan) -> patch bar terakhir saja,
+      bar closed sebelumnya tidak mungkin berubah
+    - bar baru -> fetch_since (delta bar saja), append ke raw cache, tail 900;
+      full fetch kalau cache kosong atau delta tidak nyambung
+    """
+    probe = feed.fetch_ohlcv(tf, n=1)
+    rec = tuple(probe.iloc[-1])
+    hit = _TF_CACHE.get(tf)
+    if hit is not None and hit[0] == rec:
+        return tf, hit[2]
+
+    raw = None
+    if hit is not None and hit[0][0] == rec[0]:
+        raw = pd.concat([hit[1].iloc[:-1], probe], ignore_index=True)
+    elif hit is not None:
+        prev = hit[1]
+        since = prev["time"].iloc[-1]
+        new = feed.fetch_since(tf, since, n_max=TF_BARS)
+        if len(new) and new["time"].iloc[0] == since:
+            raw = pd.concat([prev.iloc[:-1], new], ignore_index=True).tail(TF_BARS).reset_index(drop=True)
+    if raw is None:
+        raw = feed.fetch_ohlcv(tf, n=TF_BARS)
+
+    df = add_indicators(raw.copy(), symbol=settings.symbol, timeframe=tf, float32=settings.use_float32)
+    _TF_CACHE[tf] = (rec, raw, df)
+    return tf, df
+
+
+def _analyze_tf(tf: str, df: pd.DataFrame) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    struct = analyze_structure(df, swings_ready=True)
+    atr = float(df["atr14"].to_numpy()[-1]) if "atr14" in df.columns else 0.0
+    vol_z = float(df["vol_z20"].to_numpy()[-1]) if "vol_z20" in df.columns else 0.0
+
+    res = {
+        "bias": struct.get("bias", "RANGING"),
+        "event": struct.get("event", "NONE"),
+        "atr": atr,
+        "vol_z": vol_z,
+    }
+
+    if tf in ZONE_TFS:
+        tf_zones = detect_zones(df)
+    else:
+        tf_zones = {"SUPPLY": None, "DEMAND": None}
+    return tf, res, tf_zones
 
 
 # =========================================================
@@ -157,90 +332,109 @@ class Cooldowns:
 # =========================================================
 async def engine_loop(feed: MT5Feed):
     cd = Cooldowns()
-    art_dir = Path(settings.artifacts_dir)
-    art_dir.mkdir(parents=True, exist_ok=True)
+
+    # Snapshot settings ke locals (Settings frozen, tidak berubah selama loop)
+    symbol = settings.symbol
+    discord_on = settings.discord_enabled
+    mode = settings.mode
+    sleep_s = settings.loop_seconds
+    min_atr = settings.min_atr
+    chart_n = settings.chart_last_n
 
     # Boot message
-    if settings.discord_enabled:
+    if discord_on:
         try:
             await send_discord_embed(
                 title="🤖 Engine ONLINE — Swing Visual + DeepSeek AI",
                 description=(
-                    f"PAIR `{settings.symbol}` • Entry `M15` • AI `DeepSeek V3`\n"
+                    f"PAIR `{symbol}` • Entry `M15` • AI `DeepSeek V3`\n"
                     f"Smart Logic: Follow H1 Momentum enabled."
                 ),
                 color=0x95A5A6,
                 footer="Signal Engine — Swing Desk",
             )
-            print("✅ Discord message sent (boot)")
+            log.info("✅ Discord message sent (boot)")
         except Exception as e:
-            print(f"⚠️ Discord boot message failed: {e}")
+            log.warning("⚠️ Discord boot message failed: %s", e)
+
+    # Dict per tick dipakai ulang (key set sama tiap tick), bukan alloc baru
+    tf_results: Dict[str, Dict[str, Any]] = {}
+    frames: Dict[str, Any] = {}
+    zones: Dict[str, Dict[str, Any]] = {}
 
     while True:
-        print(f"\n[ENGINE] Tick | Mode={settings.mode} | {utc_now()}")
+        # Satu timestamp per tick (log + footer konsisten)
+        tick_ts = utc_now()
+        log.info("[ENGINE] Tick | Mode=%s | %s", mode, tick_ts)
 
-        tf_results: Dict[str, Dict[str, Any]] = {}
-        frames: Dict[str, Any] = {}
-        zones: Dict[str, Dict[str, Any]] = {}
+        frames.clear()
+        zones.clear()
 
-        # 1) fetch & analyze
-        for tf in TIMEFRAMES:
-            df = feed.fetch_ohlcv(tf, n=900)
-            df = add_indicators(df)
+        # 1) fetch & analyze (semua TF paralel di thread pool; IPC MT5 overlap)
+        light_task = asyncio.to_thread(feed.fetch_ohlcv_many, LIGHT_TFS, {tf: LIGHT_BARS for tf in LIGHT_TFS})
+        light, *fetched = await asyncio.gather(
+            light_task, *(asyncio.to_thread(_fetch_tf, feed, tf) for tf in HEAVY_TFS)
+        )
+        for tf, df in fetched:
             frames[tf] = df
-            struct = analyze_structure(df)
-            atr = float(df["atr14"].iloc[-1]) if "atr14" in df.columns else 0.0
-            vol_z = float(df["vol_z20"].iloc[-1]) if "vol_z20" in df.columns else 0.0
-
-            tf_results[tf] = {
-                "bias": struct.get("bias", "RANGING"),
-                "event": struct.get("event", "NONE"),
-                "atr": atr,
-                "vol_z": vol_z,
-            }
-
-            if tf in ZONE_TFS:
-                zones[tf] = detect_zones(df)
-            else:
-                zones[tf] = {"SUPPLY": None, "DEMAND": None}
-            
+
+        for tf, df in light.items():
+            log.info("  - %s | close=%.2f", tf, float(df["close"].to_numpy()[-1]))
+
+        # Fractal swings semua TF dalam satu kernel (SoA, prange per TF);
+        # frame dari _TF_CACHE sudah punya swing_high/swing_low, di-skip
+        fresh = {tf: df for tf, df in frames.items() if "swing_high" not in df.columns}
+        if fresh:
+            detect_swings_multi(fresh, lookback=3)
+
+        results = await asyncio.gather(*(asyncio.to_thread(_analyze_tf, tf, frames[tf]) for tf in HEAVY_TFS))
+        for tf, res, tf_zones in results:
+            # Row tf_results di-update in place; zones[tf] hasil memo (shared) -> assign saja
+            tf_results.setdefault(tf, {}).update(res)
+            zones[tf] = tf_zones
+
             # Simple print
-            print(f"  - {tf} | {tf_results[tf]['bias']} | ATR={atr:.1f}")
+            log.info("  - %s | %s | ATR=%.1f", tf, res["bias"], res["atr"])
 
         # 2) Sanity & Swing Gate
-        atr_allowed, atr_reason = no_trade_gate(
-            {k: v for k, v in tf_results.items() if k in ["M15", "H1", "H4"]}, settings.min_atr
-        )
+        atr_allowed, atr_reason = no_trade_gate(tf_results, min_atr)
         gate_ok, gate_reason = _swing_gate(tf_results)
 
         m15_df = frames["M15"]
         h1_df = frames["H1"]
-        liq = detect_liquidity_sweep(m15_df, lookback=60, wick_ratio=0.55)
-        fake = detect_fake_breakout(m15_df, lookback=60)
-        
+        # Scalar bar terakhir M15 (input AI), diambil sekali dari ndarray
+        m15_last = {c: float(m15_df[c].to_numpy()[-1]) for c in ("close", "ema50", "ema200", "rsi14")}
+        m15_bar_ts = m15_df["time"].iloc[-1]
+        # Sweep + fake breakout dalam satu pass; dipecah lagi ke bentuk lama
+        # (liq sweep-only ke AI/watch, fake ke entry engine)
+        both = detect_liquidity(m15_df, lookback=60, wick_ratio=0.55)
+        liq = {"sweep": both["sweep"], "level": both["level"], "notes": both["notes"]}
+        fake = {"fake": both["fake"], "level": both["fake_level"]}
+
         # --- Logic: Jika Gate Fail, Kirim Watch Report (Include AI) ---
         if not atr_allowed or not gate_ok:
             reason = atr_reason if not atr_allowed else gate_reason
-            print(f"🚫 NO TRADE — {reason}")
+            log.info("🚫 NO TRADE — %s", reason)
             
             # Cek cooldown watch dulu biar gak boros AI
-            if cd.can_watch() and settings.discord_enabled:
-                print("🧠 Calling DeepSeek for WATCH Analysis...")
-                ai_narrative = analyze_market_with_megallm(
-                    symbol=settings.symbol,
+            if cd.can_watch() and discord_on:
+                log.info("🧠 Calling DeepSeek for WATCH Analysis...")
+                # Jalan bareng render chart di publish_watch_report
+                ai_task = asyncio.create_task(_ai_narrative(
+                    cd, m15_bar_ts, "WATCH",
+                    symbol=symbol,
                     timeframe="M15",
                     bias=tf_results["M15"]["bias"], 
-                    close=float(m15_df["close"].iloc[-1]),
-                    ema50=float(m15_df["ema50"].iloc[-1]),
-                    ema200=float(m15_df["ema200"].iloc[-1]),
-                    rsi=float(m15_df["rsi14"].iloc[-1]),
+                    close=m15_last["close"],
+                    ema50=m15_last["ema50"],
+                    ema200=m15_last["ema200"],
+                    rsi=m15_last["rsi14"],
                     zones=zones["M15"],
                     liquidity=liq,
-                    context="WATCH"
-                )
-                await publish_watch_report(frames, tf_results, zones, reason, cd, art_dir, ai_narrative)
+                ))
+                await publish_watch_report(frames, tf_results, zones, liq, fake, reason, cd, ai_task, tick_ts)
             
-            await asyncio.sleep(settings.loop_seconds)
+            await asyncio.sleep(sleep_s)
             continue
 
         # 5) Build Plan (Kalau Gate Lolos)
@@ -252,7 +446,7 @@ async def engine_loop(feed: MT5Feed):
         ltf_bias = tf_results["M15"]["bias"]
 
         plan = build_trade_plan(
-            symbol=settings.symbol,
+            symbol=symbol,
             htf_bias=htf_bias_to_use, # Use H1 bias if H4 is Ranging
             ltf_bias=ltf_bias,
             m15_df=m15_df,
@@ -260,36 +454,36 @@ async def engine_loop(feed: MT5Feed):
             zones_m15=zones["M15"],
             liquidity_m15=liq,
             fakeout_m15=fake,
-            mode=settings.mode,
+            mode=mode,
         )
 
         if plan is None:
             reason = "Gate OK but No Setup (Zone/Liq)"
-            print(f"🚫 NO TRADE — {reason}")
-            await asyncio.sleep(settings.loop_seconds)
+            log.info("🚫 NO TRADE — %s", reason)
+            await asyncio.sleep(sleep_s)
             continue
 
         # 6) Publish Signal
         if not cd.can_signal():
-            print(f"⏳ Signal cooldown active. Skip.")
-            await asyncio.sleep(settings.loop_seconds)
+            log.info("⏳ Signal cooldown active. Skip.")
+            await asyncio.sleep(sleep_s)
             continue
             
-        print("🧠 Calling DeepSeek for TRADE Analysis...")
-        ai_narrative = analyze_market_with_megallm(
-            symbol=settings.symbol,
+        log.info("🧠 Calling DeepSeek for TRADE Analysis...")
+        # Request AI jalan selagi chart di-render di thread
+        ai_task = asyncio.create_task(_ai_narrative(
+            cd, m15_bar_ts, "TRADE",
+            symbol=symbol,
             timeframe="M15",
             bias=plan.market_bias,
-            close=float(m15_df["close"].iloc[-1]),
-            ema50=float(m15_df["ema50"].iloc[-1]),
-            ema200=float(m15_df["ema200"].iloc[-1]),
-            rsi=float(m15_df["rsi14"].iloc[-1]),
+            close=m15_last["close"],
+            ema50=m15_last["ema50"],
+            ema200=m15_last["ema200"],
+            rsi=m15_last["rsi14"],
             zones=zones["M15"],
             liquidity=liq,
-            context="TRADE"
-        )
+        ))
 
-        image_path = (art_dir / f"{settings.symbol}_M15_signal.png").as_posix()
         rp = RenderPlan(
             symbol=plan.symbol, tf="M15", side=plan.side,
             entry=float(sum(plan.entry_zone)/2), sl=float(plan.sl),
@@ -299,54 +493,67 @@ async def engine_loop(feed: MT5Feed):
         )
 
         try:
-            render_swing_chart(m15_df, zones["M15"], rp, image_path, settings.chart_last_n)
-            if settings.discord_enabled:
-                title = f"📌 {settings.symbol} — {plan.side.upper()} SETUP"
+            ai_narrative, png = await asyncio.gather(
+                ai_task,
+                asyncio.to_thread(render_chart_cached, m15_df, zones["M15"], rp, SIGNAL_CHART, chart_n),
+            )
+            if discord_on:
+                side = plan.side.upper()
+                title = SIGNAL_TITLE.format(side=side)
                 desc = _format_trade_text(plan, ai_analysis=ai_narrative)
-                footer = f"DeepSeek V3 | {utc_now()}"
-                color = 0x2ECC71 if plan.side.upper() == "BUY" else 0xE74C3C
+                footer = f"DeepSeek V3 | {tick_ts}"
+                color = BUY_COLOR if side == "BUY" else SELL_COLOR
                 
-                await send_discord_embed_with_image(title, desc, image_path, color, footer)
+                await send_discord_embed_with_image(title, desc, None, color, footer, image_bytes=png)
                 cd.mark_signal()
-                print("✅ SIGNAL SENT!")
+                log.info("✅ SIGNAL SENT!")
         except Exception as e:
-            print(f"❌ Signal Failed: {e}")
+            log.error("❌ Signal Failed: %s", e)
 
-        await asyncio.sleep(settings.loop_seconds)
+        await asyncio.sleep(sleep_s)
 
 
-async def publish_watch_report(frames, tf_results, zones, reason: str, cd: Cooldowns, art_dir: Path, ai_narrative: str):
+async def publish_watch_report(frames, tf_results, zones, liq: dict, fake: dict, reason: str, cd: Cooldowns, ai_task: Awaitable[str], tick_ts: str):
     try:
         m15_df = frames["M15"]
-        liq = detect_liquidity_sweep(m15_df, lookback=60, wick_ratio=0.55)
-        fake = detect_fake_breakout(m15_df, lookback=60)
-
-        image_path = (art_dir / f"{settings.symbol}_M15_watch.png").as_posix()
 
-        # Render Chart (No Plan)
-        render_swing_chart(
-            df=m15_df,
-            zones=zones["M15"],
-            plan=None,
-            out_path=image_path,
-            last_n=settings.chart_last_n,
+        # Render Chart (No Plan) di thread, overlap dengan request AI
+        ai_narrative, png = await asyncio.gather(
+            ai_task,
+            asyncio.to_thread(
+                render_chart_cached,
+                df=m15_df,
+                zones=zones["M15"],
+                plan=None,
+                slot=WATCH_CHART,
+                last_n=settings.chart_last_n,
+            ),
         )
 
-        title = f"🛰️ MARKET WATCH — {settings.symbol}"
         desc = _format_watch_report(settings.symbol, tf_results, zones["M15"], liq, fake, reason, ai_analysis=ai_narrative)
-        footer = f"{utc_now()} | Next Check: {settings.watch_status_seconds}s"
+        footer = WATCH_FOOTER.format(now=tick_ts)
 
         await send_discord_embed_with_image(
-            title=title,
+            title=WATCH_TITLE,
             description=desc,
-            image_path=image_path,
-            color=0x34495E, # Dark Blue for Watch
+            image_path=None,
+            color=WATCH_COLOR,
             footer=footer,
+            image_bytes=png,
         )
-        print("✅ Watch Report Sent (with AI)")
+        log.info("✅ Watch Report Sent (with AI)")
         cd.mark_watch()
     except Exception as e:
-        print(f"⚠️ Watch Report Failed: {e}")
+        log.warning("⚠️ Watch Report Failed: %s", e)
+
+
+async def _run(feed: MT5Feed):
+    try:
+        await engine_loop(feed)
+    finally:
+        # Tutup session HTTP persistent (notify + AI client) di event loop yang sama
+        await close_session()
+        await close_ai_client()
 
 
 def main():
@@ -356,18 +563,28 @@ def main():
     print(f" AI Brain:", f"{settings.megallm_model}" if settings.use_ai_narrative else "OFF")
     print("===================================")
 
+    listener = _setup_logging()
+
     feed = MT5Feed(symbol=settings.symbol)
     status = feed.connect()
 
     if not status.ok:
-        print(f"🔴 MT5 ERROR: {status.reason}")
+        log.error("🔴 MT5 ERROR: %s", status.reason)
+        listener.stop()
         return
 
-    print("🟢 MT5 READY")
+    log.info("🟢 MT5 READY")
+
+    # Pre-compile kernel numba sebelum loop (tick pertama tanpa JIT latency)
+    t0 = time.perf_counter()
+    warmup_kernels()
+    log.info("⚙️ Kernels warm (%.2fs)", time.perf_counter() - t0)
+
     try:
-        asyncio.run(engine_loop(feed))
+        asyncio.run(_run(feed))
     finally:
         feed.shutdown()
+        listener.stop()
 
 
 if __name__ == "__main__":
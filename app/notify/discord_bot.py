@@ -1,12 +1,24 @@
-import aiohttp
 import json
 from typing import Optional
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson optional, fallback stdlib json
+    orjson = None
+
 from app.config import settings
+from app.notify.session import get_session, read_file
 
 DISCORD_API = "https://discord.com/api/v10"
 
 
+def _dumps(obj) -> bytes:
+    # orjson langsung bytes (tanpa encode step)
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
 def _auth_headers():
     return {
         "Authorization": f"Bot {settings.discord_bot_token}",
@@ -35,23 +47,28 @@ async def send_discord_embed(
 
     payload = {"embeds": [embed]}
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers={**_auth_headers(), "Content-Type": "application/json"}, json=payload) as r:
-            text = await r.text()
-            if r.status >= 300:
-                raise RuntimeError(f"Discord send failed ({r.status}): {text}")
+    client = await get_session()
+    r = await client.post(
+        url,
+        headers={**_auth_headers(), "Content-Type": "application/json"},
+        content=_dumps(payload),
+    )
+    if r.status_code >= 300:
+        raise RuntimeError(f"Discord send failed ({r.status_code}): {r.text}")
 
 
 async def send_discord_embed_with_image(
     title: str,
     description: str,
-    image_path: str,
+    image_path: Optional[str],
     color: int = 0x3498DB,
     footer: Optional[str] = None,
+    image_bytes: Optional[bytes] = None,
 ):
     """
     Send embed + attached image (PNG) to a Discord channel.
     Uses multipart form-data (file + payload_json).
+    image_bytes (PNG hasil render in-memory) dipakai kalau ada, tanpa baca disk.
     """
     url = f"{DISCORD_API}/channels/{settings.discord_channel_id}/messages"
 
@@ -66,19 +83,12 @@ async def send_discord_embed_with_image(
 
     payload = {"embeds": [embed]}
 
-    form = aiohttp.FormData()
-    form.add_field("payload_json", json.dumps(payload), content_type="application/json")
-
-    with open(image_path, "rb") as f:
-        form.add_field(
-            "files[0]",
-            f,
-            filename="chart.png",
-            content_type="image/png",
-        )
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=_auth_headers(), data=form) as r:
-                text = await r.text()
-                if r.status >= 300:
-                    raise RuntimeError(f"Discord send failed ({r.status}): {text}")
+    files = {
+        "payload_json": (None, _dumps(payload), "application/json"),
+        "files[0]": ("chart.png", image_bytes if image_bytes is not None else await read_file(image_path), "image/png"),
+    }
+
+    client = await get_session()
+    r = await client.post(url, headers=_auth_headers(), files=files)
+    if r.status_code >= 300:
+        raise RuntimeError(f"Discord send failed ({r.status_code}): {r.text}")
@@ -0,0 +1,42 @@
+import asyncio
+import httpx
+from pathlib import Path
+from typing import Optional
+
+try:
+    import aiofiles
+except ImportError:  # pragma: no cover - aiofiles optional, fallback thread read
+    aiofiles = None
+
+# Satu client HTTP/2 untuk semua notifier (Discord, Telegram):
+# TLS handshake sekali, request multiplexed di satu koneksi, header di-HPACK
+_client: Optional[httpx.AsyncClient] = None
+
+
+async def get_session() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(20.0),
+            limits=httpx.Limits(max_connections=4, keepalive_expiry=75),
+        )
+    return _client
+
+
+async def close_session() -> None:
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+async def read_file(path: str) -> bytes:
+    """
+    Baca file (chart PNG) tanpa blok event loop.
+    httpx multipart butuh bytes/file sync, jadi dibaca utuh (PNG ~100-200 KB).
+    """
+    if aiofiles is not None:
+        async with aiofiles.open(path, "rb") as f:
+            return await f.read()
+    return await asyncio.to_thread(Path(path).read_bytes)
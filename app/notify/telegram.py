@@ -1,13 +1,27 @@
-import requests
+import asyncio
+import logging
+from pathlib import Path
+
 from app.config import settings
+from app.notify.session import close_session, get_session, read_file
+
+log = logging.getLogger(__name__)
+
+TELEGRAM_API = "https://api.telegram.org"
 
 
-def send_message(text: str) -> None:
+def _configured() -> bool:
     if not settings.telegram_bot_token or not settings.telegram_chat_id:
-        print("⚠️ Telegram not configured")
+        log.warning("⚠️ Telegram not configured")
+        return False
+    return True
+
+
+async def async_send_message(text: str) -> None:
+    if not _configured():
         return
 
-    url = f"https://api.telegram.org/bot{settings.telegram_bot_token}/sendMessage"
+    url = f"{TELEGRAM_API}/bot{settings.telegram_bot_token}/sendMessage"
     payload = {
         "chat_id": settings.telegram_chat_id,
         "text": text,
@@ -15,24 +29,71 @@ def send_message(text: str) -> None:
         "disable_web_page_preview": True,
     }
 
-    r = requests.post(url, json=payload, timeout=15)
+    client = await get_session()
+    r = await client.post(url, json=payload, timeout=15)
     if r.status_code != 200:
-        print("❌ Telegram send failed:", r.text)
+        log.warning("❌ Telegram send failed: %s", r.text)
 
 
-def send_photo(caption: str, image_path: str) -> None:
-    if not settings.telegram_bot_token or not settings.telegram_chat_id:
-        print("⚠️ Telegram not configured")
+async def async_send_photo(caption: str, image_path: str) -> None:
+    if not _configured():
         return
 
-    url = f"https://api.telegram.org/bot{settings.telegram_bot_token}/sendPhoto"
-    with open(image_path, "rb") as f:
-        files = {"photo": f}
-        data = {
-            "chat_id": settings.telegram_chat_id,
-            "caption": caption,
-            "parse_mode": "Markdown",
-        }
-        r = requests.post(url, files=files, data=data, timeout=20)
-        if r.status_code != 200:
-            print("❌ Telegram photo failed:", r.text)
+    url = f"{TELEGRAM_API}/bot{settings.telegram_bot_token}/sendPhoto"
+    data = {
+        "chat_id": str(settings.telegram_chat_id),
+        "caption": caption,
+        "parse_mode": "Markdown",
+    }
+    files = {"photo": (Path(image_path).name, await read_file(image_path), "image/png")}
+
+    client = await get_session()
+    r = await client.post(url, data=data, files=files, timeout=20)
+    if r.status_code != 200:
+        log.warning("❌ Telegram photo failed: %s", r.text)
+
+
+# =========================
+# SYNC API (nama lama, tetap sync untuk caller non-async)
+# =========================
+# Task fire-and-forget yang masih jalan: asyncio cuma pegang weakref ke task,
+# tanpa referensi kuat task bisa di-GC di tengah kirim
+_PENDING: "set[asyncio.Task]" = set()
+
+
+def _task_done(task: asyncio.Task) -> None:
+    _PENDING.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("❌ Telegram send failed: %s", task.exception())
+
+
+def _run_sync(coro):
+    """
+    Di luar event loop -> jalankan sampai selesai.
+    Di dalam loop yang sudah jalan -> jadwalkan sebagai task (fire-and-forget),
+    task disimpan di _PENDING sampai selesai dan dikembalikan ke caller.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_with_close(coro))
+    task = loop.create_task(coro)
+    _PENDING.add(task)
+    task.add_done_callback(_task_done)
+    return task
+
+
+async def _with_close(coro):
+    # asyncio.run bikin loop baru; session harus ditutup sebelum loop mati
+    try:
+        return await coro
+    finally:
+        await close_session()
+
+
+def send_message(text: str):
+    return _run_sync(async_send_message(text))
+
+
+def send_photo(caption: str, image_path: str):
+    return _run_sync(async_send_photo(caption, image_path))
@@ -4,10 +4,14 @@ from dataclasses import dataclass
 from typing import Dict, Optional, Literal, Tuple
 import pandas as pd
 
+from app._njit import njit
+
 
 Side = Literal["BUY", "SELL"]
 Bias = Literal["BULLISH", "BEARISH", "RANGING"]
 
+_TAIL_COLS = ("close", "atr14", "ema50", "ema200", "rsi14")
+
 
 @dataclass(frozen=True)
 class TradePlan:
@@ -24,10 +28,12 @@ class TradePlan:
     reason: str
 
 
+@njit(cache=True)
 def _clamp_conf(x: float) -> float:
     return max(0.0, min(100.0, x))
 
 
+@njit(cache=True)
 def _rr(entry: float, sl: float, tp: float) -> float:
     risk = abs(entry - sl)
     reward = abs(tp - entry)
@@ -36,6 +42,77 @@ def _rr(entry: float, sl: float, tp: float) -> float:
     return reward / risk
 
 
+@njit(cache=True)
+def _atr_step(atr: float, mult: float) -> float:
+    # == max(atr * mult, 1.0) versi builtin Python (NaN ATR tetap NaN)
+    x = atr * mult
+    return 1.0 if 1.0 > x else x
+
+
+@njit(cache=True)
+def _levels(entry_low: float, entry_high: float, atr: float, is_buy: bool):
+    """
+    Entry mid, SL di luar zone (+ATR buffer), TP ladder 1/2/3 ATR.
+    """
+    entry_mid = (entry_low + entry_high) / 2.0
+    if is_buy:
+        sl = entry_low - _atr_step(atr, 0.35)
+        tp1 = entry_mid + _atr_step(atr, 1.0)
+        tp2 = entry_mid + _atr_step(atr, 2.0)
+        tp3 = entry_mid + _atr_step(atr, 3.0)
+    else:
+        sl = entry_high + _atr_step(atr, 0.35)
+        tp1 = entry_mid - _atr_step(atr, 1.0)
+        tp2 = entry_mid - _atr_step(atr, 2.0)
+        tp3 = entry_mid - _atr_step(atr, 3.0)
+    return entry_mid, sl, tp1, tp2, tp3
+
+
+@njit(cache=True)
+def _score(is_buy: bool, ema50: float, ema200: float, rsi: float, last_close: float,
+           entry_mid: float, atr: float, rr_val: float, safe: bool) -> float:
+    """
+    Confidence scoring (simple but disciplined), base 50.
+    """
+    conf = 50.0
+
+    # EMA alignment
+    if is_buy and ema50 > ema200:
+        conf += 10
+    if not is_buy and ema50 < ema200:
+        conf += 10
+
+    # RSI sanity
+    if is_buy and 45 <= rsi <= 70:
+        conf += 8
+    if not is_buy and 30 <= rsi <= 55:
+        conf += 8
+
+    # Penalize if close is far from zone (missed entry)
+    dist = abs(last_close - entry_mid)
+    if atr > 0 and dist > atr * 2.0:
+        conf -= 15
+
+    # Reward RR
+    if rr_val >= 2.0:
+        conf += 10
+    elif rr_val >= 1.5:
+        conf += 6
+    elif rr_val < 1.2:
+        conf -= 10
+
+    # SAFE mode cap
+    if safe:
+        conf = min(conf, 80.0)
+
+    return _clamp_conf(conf)
+
+
+# Warm-up sekali saat import biar signal pertama tidak kena compile latency
+_levels(1.0, 2.0, 1.0, True)
+_score(True, 1.0, 1.0, 50.0, 1.0, 1.0, 1.0, _rr(1.0, 0.5, 2.0), True)
+
+
 def build_trade_plan(
     symbol: str,
     htf_bias: Bias,
@@ -65,8 +142,11 @@ def build_trade_plan(
     if ltf_bias != htf_bias:
         return None
 
-    last_close = float(m15_df["close"].iloc[-1])
-    atr_m15 = float(m15_df["atr14"].iloc[-1]) if "atr14" in m15_df.columns else 0.0
+    # Bar terakhir dibaca sekali (numpy, bukan .iloc per kolom)
+    cols = m15_df.columns
+    last = {c: float(m15_df[c].to_numpy()[-1]) for c in _TAIL_COLS if c in cols}
+    last_close = last["close"]
+    atr_m15 = last.get("atr14", 0.0)
 
     # Liquidity filters
     sweep = liquidity_m15.get("sweep")
@@ -82,16 +162,6 @@ def build_trade_plan(
         if not zone:
             return None
 
-        entry_low = float(zone["low"])
-        entry_high = float(zone["high"])
-        entry_mid = (entry_low + entry_high) / 2.0
-
-        sl = entry_low - max(atr_m15 * 0.35, 1.0)
-        # TP ladder
-        tp1 = entry_mid + max(atr_m15 * 1.0, 1.0)
-        tp2 = entry_mid + max(atr_m15 * 2.0, 1.0)
-        tp3 = entry_mid + max(atr_m15 * 3.0, 1.0)
-
     else:  # BEARISH
         side = "SELL"
         # If just swept LOW it's bullish pressure -> avoid SELL
@@ -101,56 +171,23 @@ def build_trade_plan(
         if not zone:
             return None
 
-        entry_low = float(zone["low"])
-        entry_high = float(zone["high"])
-        entry_mid = (entry_low + entry_high) / 2.0
+    entry_low = float(zone["low"])
+    entry_high = float(zone["high"])
+    is_buy = side == "BUY"
 
-        sl = entry_high + max(atr_m15 * 0.35, 1.0)
-        tp1 = entry_mid - max(atr_m15 * 1.0, 1.0)
-        tp2 = entry_mid - max(atr_m15 * 2.0, 1.0)
-        tp3 = entry_mid - max(atr_m15 * 3.0, 1.0)
+    # SL beyond zone + TP ladder
+    entry_mid, sl, tp1, tp2, tp3 = _levels(entry_low, entry_high, atr_m15, is_buy)
 
     # RR based on TP2 as main target
     rr_val = _rr(entry_mid, sl, tp2)
 
-    # Confidence scoring (simple but disciplined)
-    conf = 50.0
-
-    # Stronger if M15 is BOS
+    # Confidence scoring
     # caller can pass event via ltf_bias only; we’ll infer a bit from EMA alignment
-    ema50 = float(m15_df["ema50"].iloc[-1]) if "ema50" in m15_df.columns else last_close
-    ema200 = float(m15_df["ema200"].iloc[-1]) if "ema200" in m15_df.columns else last_close
-
-    if side == "BUY" and ema50 > ema200:
-        conf += 10
-    if side == "SELL" and ema50 < ema200:
-        conf += 10
-
-    # RSI sanity
-    rsi = float(m15_df["rsi14"].iloc[-1]) if "rsi14" in m15_df.columns else 50.0
-    if side == "BUY" and 45 <= rsi <= 70:
-        conf += 8
-    if side == "SELL" and 30 <= rsi <= 55:
-        conf += 8
-
-    # Penalize if close is far from zone (missed entry)
-    dist = abs(last_close - entry_mid)
-    if atr_m15 > 0 and dist > atr_m15 * 2.0:
-        conf -= 15
-
-    # Reward RR
-    if rr_val >= 2.0:
-        conf += 10
-    elif rr_val >= 1.5:
-        conf += 6
-    elif rr_val < 1.2:
-        conf -= 10
-
-    # SAFE mode cap
-    if mode.upper() == "SAFE":
-        conf = min(conf, 80.0)
+    ema50 = last.get("ema50", last_close)
+    ema200 = last.get("ema200", last_close)
+    rsi = last.get("rsi14", 50.0)
 
-    conf = _clamp_conf(conf)
+    conf = _score(is_buy, ema50, ema200, rsi, last_close, entry_mid, atr_m15, rr_val, mode.upper() == "SAFE")
 
     reason = (
         f"HTF aligned ({htf_bias}); zone-based entry; "
@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+import hashlib
+import io
+import weakref
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import matplotlib
+
+# Headless backend: render dipanggil dari worker thread (asyncio.to_thread),
+# backend GUI (TkAgg) tidak boleh dipakai di luar main thread.
+matplotlib.use("Agg", force=True)
+
 import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+from matplotlib import font_manager
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+from app._njit import njit
 
 @dataclass
 class RenderPlan:
@@ -25,129 +39,348 @@ class RenderPlan:
     reason: str
 
 
+# Dark theme: rcParams di-set sekali saat import (proses ini cuma render chart ini),
+# bukan plt.style.use tiap render
+plt.style.use('dark_background')
+
+# Font lookup (normal + bold dipakai label) di-resolve sekali saat import,
+# bukan di render pertama
+font_manager.findfont(font_manager.FontProperties())
+font_manager.findfont(font_manager.FontProperties(weight="bold"))
+
+
 def _ensure_dir(path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
-def _plot_candles(ax, ohlc: pd.DataFrame):
+OHLC_COLS = ["open", "high", "low", "close"]
+# 16x9 in @100 dpi = 1600x900, masih di atas resolusi tampilan embed Discord
+CHART_DPI = 100
+# Margin tetap (pengganti tight_layout per render): muat tick label kiri/bawah,
+# title, dan label SL/TP yang keluar sedikit di kanan axes
+CHART_MARGINS = {"left": 0.04, "right": 0.94, "bottom": 0.045, "top": 0.91}
+# zlib level 3 (default Pillow 6): encode lebih cepat, PNG ~25% lebih besar (masih ~150 KB)
+PNG_KWARGS = {"compress_level": 3, "optimize": False}
+ZONE_NAMES = ("DEMAND", "SUPPLY")
+# Label plan: (nama, color, fontsize, fontweight)
+PLAN_LABELS = (
+    ("SL", '#ef5350', 10, 'bold'),
+    ("TP1", '#26a69a', 9, 'normal'),
+    ("TP2", '#26a69a', 9, 'normal'),
+    ("TP3", '#26a69a', 9, 'normal'),
+)
+# Warna + label garis EMA (urutan = urutan legend); style garis sama semua
+EMA_STYLE = {
+    "ema50": ('#2962ff', "EMA50"),
+    "ema200": ('#ff6d00', "EMA200"),
+}
+EMA_LINE_KW = {"linewidth": 1.5, "alpha": 0.8}
+# Join/cap default Line2D (ax.plot), biar collection tampil sama
+EMA_COLL_KW = {"joinstyle": "round", "capstyle": "projecting"}
+
+
+@njit(cache=True, fastmath=True)
+def _bodies(ohlc, out_verts):
     """
-    Professional candlestick renderer.
+    Body candle -> out_verts float32 (N, 4, 2), satu pass tanpa array sementara.
+    ohlc float32 (N, 4); aritmetika float32 (sama dengan versi numpy sebelumnya).
+    Minimum height for doji visibility: 5% range, atau 0.0001 kalau range 0.
     """
-    x = np.arange(len(ohlc))
-    o = ohlc["open"].to_numpy()
-    h = ohlc["high"].to_numpy()
-    l = ohlc["low"].to_numpy()
-    c = ohlc["close"].to_numpy()
+    for i in range(ohlc.shape[0]):
+        o = ohlc[i, 0]
+        c = ohlc[i, 3]
+        rng = ohlc[i, 1] - ohlc[i, 2]
+        bl = c if c < o else o
+        ht = abs(c - o)
+        m = rng * np.float32(0.05) if rng > 0 else np.float32(0.0001)
+        if m > ht:
+            ht = m
+        out_verts[i, 0, 0] = i - 0.35
+        out_verts[i, 1, 0] = i + 0.35
+        out_verts[i, 2, 0] = i + 0.35
+        out_verts[i, 3, 0] = i - 0.35
+        out_verts[i, 0, 1] = bl
+        out_verts[i, 1, 1] = bl
+        out_verts[i, 2, 1] = bl + ht
+        out_verts[i, 3, 1] = bl + ht
+
+
+# Warm-up sekali saat import biar render pertama tidak kena compile latency
+_bodies(np.zeros((2, 4), dtype=np.float32), np.empty((2, 4, 2), dtype=np.float32))
+
+
+# n -> sumbu x 0..n-1 (float32, read-only); n praktis cuma beberapa nilai (last_n)
+_X_CACHE: Dict[int, np.ndarray] = {}
+
+
+def _x(n: int) -> np.ndarray:
+    a = _X_CACHE.get(n)
+    if a is None:
+        a = np.arange(n, dtype=np.float32)
+        a.setflags(write=False)
+        _X_CACHE[n] = a
+    return a
+
+
+def _candle_geometry(ohlc: np.ndarray):
+    """
+    ohlc (n, 4) -> (wick segments (n, 2, 2), body verts (n, 4, 2), colors).
+    Buffer geometri float32 (setengah memori float64; matplotlib upcast saat draw).
+    """
+    x = _x(len(ohlc))
+    o, h, l, c = ohlc.T
 
     # Define colors
     col_up = '#26a69a'   # Greenish
     col_dn = '#ef5350'   # Reddish
-    
+
     # Vectorized color array
     colors = np.where(c >= o, col_up, col_dn)
 
-    # Wicks (Vlines)
-    ax.vlines(x, l, h, colors=colors, linewidth=1, alpha=0.9)
-    
-    # Bodies (Patches)
-    for i in range(len(ohlc)):
-        body_low = min(o[i], c[i])
-        height = abs(c[i] - o[i])
-        # Minimum height for doji visibility
-        height = max(height, (h[i]-l[i])*0.05 if (h[i]-l[i])>0 else 0.0001)
-        
-        rect = plt.Rectangle(
-            (x[i] - 0.35, body_low),
-            0.7,
-            height,
-            facecolor=colors[i],
-            edgecolor=colors[i],
-            alpha=1.0
-        )
-        ax.add_patch(rect)
+    # Wicks: segment (x, low) -> (x, high)
+    wicks = np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1)
+
+    # Bodies: vertex (N, 4, 2) diisi kernel numba satu pass
+    verts = np.empty((len(ohlc), 4, 2), dtype=np.float32)
+    _bodies(ohlc, verts)
+    return wicks, verts, colors
+
+
+def _plot_candles(ax, ohlc: np.ndarray):
+    """
+    Professional candlestick renderer.
+    ohlc: array (n, 4) kolom O/H/L/C (float32 cukup untuk plotting).
+    Wicks + bodies masing-masing satu collection (bukan satu artist per candle).
+    """
+    wicks, verts, colors = _candle_geometry(ohlc)
+    wick_coll = ax.add_collection(LineCollection(wicks, colors=colors, linewidths=1, alpha=0.9), autolim=False)
+    # Bodies cuma fill: tanpa stroke edge (warna sama) dan tanpa AA, Agg cukup satu pass per body
+    body_coll = ax.add_collection(
+        PolyCollection(verts, facecolors=colors, edgecolors='none', linewidths=0, antialiased=False, alpha=1.0), autolim=False
+    )
+    return wick_coll, body_coll
+
 
+def _ema_segments(tail: Dict[str, np.ndarray], cols: Tuple[str, ...]) -> List[np.ndarray]:
+    """Satu polyline (n, 2) per kolom EMA untuk LineCollection."""
+    x = _x(len(tail["close"]))
+    return [np.column_stack([x, tail[col]]) for col in cols]
 
-def _zone_box(ax, x0: int, x1: int, low: float, high: float, label: str):
+
+def _zone_color(label: str) -> str:
     # Supply = Red tint, Demand = Green tint
-    color = 'green' if "DEMAND" in label else 'red'
-    
+    return 'green' if "DEMAND" in label else 'red'
+
+
+def _zone_box(text, batch: Dict[str, list], x0: int, x1: int, low: float, high: float, label: str):
+    """
+    Fill + border zone cuma di-append ke batch (digambar sekaligus oleh caller),
+    label = Text yang sudah dialokasikan (cuma di-update).
+    """
+    color = _zone_color(label)
+
     # Fill
-    ax.add_patch(
-        plt.Rectangle(
-            (x0, low),
-            x1 - x0,
-            high - low,
-            facecolor=color,
-            alpha=0.15,
-            edgecolor=None
-        )
-    )
+    batch["verts"].append(((x0, low), (x1, low), (x1, high), (x0, high)))
+    batch["fill"].append(color)
     # Border Lines
-    ax.hlines(y=[low, high], xmin=x0, xmax=x1, colors=color, linestyles='--', linewidth=0.8, alpha=0.6)
-    
+    batch["border_y"] += [low, high]
+    batch["border_c"] += [color, color]
+
     # Label
-    mid_y = (low + high) / 2
-    ax.text(x0 + 2, high, f"{label}\n[{low:.2f}-{high:.2f}]", 
-            color=color, fontsize=8, fontweight='bold', va='bottom', alpha=0.8)
+    text.set_position((x0 + 2, high))
+    text.set_text(f"{label}\n[{low:.2f}-{high:.2f}]")
+    text.set_visible(True)
 
 
-def render_swing_chart(
-    df: pd.DataFrame,
-    zones: Dict[str, Optional[Dict[str, Any]]],
-    plan: Optional[RenderPlan],
-    out_path: str,
-    last_n: int = 220,
-):
+def _draw_zones(ax, n: int, zones, zone_texts: Dict[str, Any]) -> List[Any]:
     """
-    Creates Institutional-Style PNG chart.
+    Semua zone: label per zone (Text dipakai ulang, hidden kalau zone tidak ada)
+    + satu PolyCollection (fill) + satu LineCollection (border).
+    Returns collection zone (diganti kalau zones berubah).
     """
-    if df is None or len(df) < 50:
-        raise RuntimeError("Not enough data to render chart")
+    x0 = max(0, n - 160)
+    x1 = n + 15 # Extend to future
 
-    work = df.copy()
-    work = work.tail(last_n).reset_index(drop=True)
+    batch: Dict[str, list] = {"verts": [], "fill": [], "border_y": [], "border_c": [], "artists": []}
+    for name in ZONE_NAMES:
+        if zones and zones.get(name):
+            z = zones[name]
+            _zone_box(zone_texts[name], batch, x0, x1, float(z["low"]), float(z["high"]), name)
+        else:
+            zone_texts[name].set_visible(False)
+
+    if batch["verts"]:
+        batch["artists"].append(ax.add_collection(
+            PolyCollection(batch["verts"], facecolors=batch["fill"], edgecolors='none', alpha=0.15), autolim=False
+        ))
+        batch["artists"].append(
+            ax.hlines(y=batch["border_y"], xmin=x0, xmax=x1, colors=batch["border_c"], linestyles='--', linewidth=0.8, alpha=0.6)
+        )
+    return batch["artists"]
 
-    required = {"open", "high", "low", "close"}
-    if not required.issubset(set(work.columns)):
-        raise RuntimeError(f"DF missing columns: {required - set(work.columns)}")
 
-    # Dark Theme Background
-    plt.style.use('dark_background')
-    fig = plt.figure(figsize=(16, 9))
-    ax = fig.add_subplot(111)
-    
+@dataclass
+class _Background:
+    """
+    Artist background yang dipertahankan di figure yang dipakai ulang;
+    tick berikutnya cukup ganti data (set_segments / set_verts / set_ydata).
+    """
+    ax: Any
+    wicks: LineCollection
+    bodies: PolyCollection
+    ema_coll: Optional[LineCollection]
+    ema_cols: Tuple[str, ...]
+    price_line: Any
+    price_text: Any
+    zone_texts: Dict[str, Any]
+    plan_texts: List[Any]
+    zone_artists: List[Any]
+    zones_repr: str
+    n: int
+
+
+# fig -> (key background, artist background, artist overlay plan) untuk figure yang dipakai ulang
+_FIG_STATE: "weakref.WeakKeyDictionary[Figure, Tuple[tuple, _Background, List[Any]]]" = weakref.WeakKeyDictionary()
+
+
+def _background_key(tail: Dict[str, np.ndarray], ohlc: np.ndarray, zones) -> tuple:
+    """
+    Key isi background: bytes OHLC + EMA (forming bar ikut terhitung) + zones.
+    """
+    h = hashlib.blake2b(ohlc.tobytes(), digest_size=16)
+    for col in EMA_STYLE:
+        if col in tail:
+            h.update(col.encode())
+            h.update(np.ascontiguousarray(tail[col], dtype=np.float64).view(np.uint8))
+    return (len(ohlc), h.digest(), repr(zones))
+
+
+def _style_axes(fig: Figure, ax):
+    """
+    Chrome yang konstan (background, grid, frame, tick colors).
+    Dipanggil sekali per axes baru; axes yang dipakai ulang tidak di-style lagi.
+    """
     # Background tweaks
     ax.set_facecolor('#0b0e11') # Binance-like dark blue/black
     fig.patch.set_facecolor('#0b0e11')
 
+    ax.grid(True, color='#2c3e50', alpha=0.3, linestyle='--')
+
+    # Remove frame
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['bottom'].set_color('#2c3e50')
+    ax.spines['left'].set_color('#2c3e50')
+    ax.tick_params(axis='x', colors='gray')
+    ax.tick_params(axis='y', colors='gray')
+
+
+def _draw_background(fig: Figure, tail: Dict[str, np.ndarray], ohlc: np.ndarray, zones) -> _Background:
+    """
+    Bagian mahal yang cuma berubah kalau bar/zones berubah:
+    candles, EMA, garis harga terakhir, zones, grid, legend, spines.
+    """
+    fig.subplots_adjust(**CHART_MARGINS)
+    ax = fig.add_subplot(111)
+    _style_axes(fig, ax)
+
+    # Limits eksplisit sebelum artist ditambah: tanpa autoscale / update dataLim
+    # per artist (y-limits di-set tiap render oleh _draw_plan)
+    ax.set_autoscale_on(False)
+    ax.set_xlim(0, len(ohlc) + 15)
+
     # Plot Candles
-    _plot_candles(ax, work)
+    wick_coll, body_coll = _plot_candles(ax, ohlc)
 
-    x = np.arange(len(work))
-    last_idx = len(work) - 1
-    last_price = float(work["close"].iloc[-1])
+    last_idx = len(ohlc) - 1
+    last_price = float(tail["close"][-1])
 
-    # EMA plots
-    if "ema50" in work.columns:
-        ax.plot(x, work["ema50"].to_numpy(), color='#2962ff', linewidth=1.5, label="EMA50", alpha=0.8)
-    if "ema200" in work.columns:
-        ax.plot(x, work["ema200"].to_numpy(), color='#ff6d00', linewidth=1.5, label="EMA200", alpha=0.8)
+    # EMA: semua garis satu LineCollection (bukan ax.plot per garis)
+    ema_cols = tuple(col for col in EMA_STYLE if col in tail)
+    ema_coll = None
+    if ema_cols:
+        ema_coll = ax.add_collection(LineCollection(
+            _ema_segments(tail, ema_cols),
+            colors=[EMA_STYLE[col][0] for col in ema_cols], **EMA_LINE_KW, **EMA_COLL_KW,
+        ), autolim=False)
 
     # Current Price Line
-    ax.axhline(last_price, color='white', linestyle=':', linewidth=0.8, alpha=0.7)
-    ax.text(last_idx + 1, last_price, f" {last_price:.2f}", color='white', va='center', fontsize=9)
+    price_line = ax.axhline(last_price, color='white', linestyle=':', linewidth=0.8, alpha=0.7)
+    price_text = ax.text(last_idx + 1, last_price, f" {last_price:.2f}", color='white', va='center', fontsize=9)
+
+    # Label zone + plan: Text dialokasikan sekali per axes, tiap render cuma
+    # set_text/set_position (hidden kalau tidak dipakai)
+    zone_texts = {
+        name: ax.text(0, 0, "", color=_zone_color(name), fontsize=8, fontweight='bold', va='bottom', alpha=0.8, visible=False)
+        for name in ZONE_NAMES
+    }
+    plan_texts = [
+        ax.text(0, 0, "", color=color, fontsize=size, fontweight=weight, visible=False)
+        for _, color, size, weight in PLAN_LABELS
+    ]
 
     # Zones
-    x0 = max(0, len(work) - 160)
-    x1 = len(work) + 15 # Extend to future
+    zone_artists = _draw_zones(ax, len(ohlc), zones, zone_texts)
 
-    if zones and zones.get("DEMAND"):
-        z = zones["DEMAND"]
-        _zone_box(ax, x0, x1, float(z["low"]), float(z["high"]), "DEMAND")
+    # Legend EMA pakai proxy handle (collection tidak punya label per garis)
+    handles = [Line2D([], [], color=EMA_STYLE[col][0], label=EMA_STYLE[col][1], **EMA_LINE_KW) for col in ema_cols]
+    ax.legend(handles=handles, loc="upper left", facecolor='#1e272e', edgecolor='none', labelcolor='white')
+    return _Background(
+        ax=ax, wicks=wick_coll, bodies=body_coll, ema_coll=ema_coll, ema_cols=ema_cols,
+        price_line=price_line, price_text=price_text,
+        zone_texts=zone_texts, plan_texts=plan_texts,
+        zone_artists=zone_artists, zones_repr=repr(zones), n=len(ohlc),
+    )
 
-    if zones and zones.get("SUPPLY"):
-        z = zones["SUPPLY"]
-        _zone_box(ax, x0, x1, float(z["low"]), float(z["high"]), "SUPPLY")
+
+def _update_background(bg: _Background, tail: Dict[str, np.ndarray], ohlc: np.ndarray, zones) -> None:
+    """
+    Jumlah bar & kolom EMA sama: artist yang ada cuma diganti datanya
+    (tanpa clear + bangun ulang axes, style, legend).
+    """
+    wicks, verts, colors = _candle_geometry(ohlc)
+    bg.wicks.set_segments(wicks)
+    bg.wicks.set_color(colors)
+    bg.bodies.set_verts(verts)
+    bg.bodies.set_facecolor(colors)
+
+    if bg.ema_coll is not None:
+        bg.ema_coll.set_segments(_ema_segments(tail, bg.ema_cols))
+
+    last_price = float(tail["close"][-1])
+    bg.price_line.set_ydata([last_price, last_price])
+    bg.price_text.set_y(last_price)
+    bg.price_text.set_text(f" {last_price:.2f}")
+
+    zones_repr = repr(zones)
+    if zones_repr != bg.zones_repr:
+        for artist in bg.zone_artists:
+            artist.remove()
+        bg.zone_artists = _draw_zones(bg.ax, bg.n, zones, bg.zone_texts)
+        bg.zones_repr = zones_repr
+
+
+def _draw_plan(bg: _Background, plan: Optional[RenderPlan], tail: Dict[str, np.ndarray], df: pd.DataFrame) -> List[Any]:
+    """
+    Pass murah di atas background: y-limits, overlay plan, title.
+    Returns artist overlay (di-remove kalau figure dipakai ulang untuk bar yang sama);
+    label SL/TP pakai Text milik background.
+    """
+    ax = bg.ax
+    artists: List[Any] = []
+    last_idx = len(tail["close"]) - 1
+
+    # Smart Y-Lim (sebelum overlay ditambah)
+    tail_h = tail["high"][-80:]
+    tail_l = tail["low"][-80:]
+    y_min = float(min(tail_h.min(), tail_l.min()))
+    y_max = float(max(tail_h.max(), tail_l.max()))
+    if plan:
+        y_min = min(y_min, plan.sl, plan.tp2)
+        y_max = max(y_max, plan.sl, plan.tp2)
+
+    pad = (y_max - y_min) * 0.1
+    ax.set_ylim(y_min - pad, y_max + pad)
 
     # Plan Overlays (Prediction)
     if plan:
@@ -156,62 +389,104 @@ def render_swing_chart(
         tp1 = float(plan.tp1)
         tp2 = float(plan.tp2)
         tp3 = float(plan.tp3)
-        
+
         # Entry Line
-        ax.axhline(entry, color='gray', linestyle='--', linewidth=1)
-        
-        # Stop Loss Area
-        if plan.side.upper() == "BUY":
-            rect_sl = plt.Rectangle((last_idx, sl), 15, entry-sl, facecolor='#ef5350', alpha=0.2)
-            rect_tp = plt.Rectangle((last_idx, entry), 15, tp3-entry, facecolor='#26a69a', alpha=0.2)
-        else:
-            rect_sl = plt.Rectangle((last_idx, entry), 15, sl-entry, facecolor='#ef5350', alpha=0.2)
-            rect_tp = plt.Rectangle((last_idx, tp3), 15, entry-tp3, facecolor='#26a69a', alpha=0.2)
-            
-        ax.add_patch(rect_sl)
-        ax.add_patch(rect_tp)
-
-        # Labels
-        ax.text(last_idx + 2, sl, f"SL: {sl:.2f}", color='#ef5350', fontsize=10, fontweight='bold')
-        ax.text(last_idx + 2, tp1, f"TP1: {tp1:.2f}", color='#26a69a', fontsize=9)
-        ax.text(last_idx + 2, tp2, f"TP2: {tp2:.2f}", color='#26a69a', fontsize=9)
-        ax.text(last_idx + 2, tp3, f"TP3: {tp3:.2f}", color='#26a69a', fontsize=9)
+        artists.append(ax.axhline(entry, color='gray', linestyle='--', linewidth=1))
+
+        # SL area (entry<->SL) + TP area (entry<->TP3): satu PolyCollection, 2 polygon
+        # (geometri sama untuk BUY/SELL, cuma arah yang beda)
+        xr = last_idx + 15
+        verts = [
+            ((last_idx, sl), (xr, sl), (xr, entry), (last_idx, entry)),
+            ((last_idx, entry), (xr, entry), (xr, tp3), (last_idx, tp3)),
+        ]
+        artists.append(ax.add_collection(
+            PolyCollection(verts, facecolors=['#ef5350', '#26a69a'], edgecolors='none', alpha=0.2), autolim=False
+        ))
+
+        # Labels (urutan = PLAN_LABELS)
+        for text, (name, *_), y in zip(bg.plan_texts, PLAN_LABELS, (sl, tp1, tp2, tp3)):
+            text.set_position((last_idx + 2, y))
+            text.set_text(f"{name}: {y:.2f}")
+            text.set_visible(True)
 
         # Arrow Logic
-        if plan.side.upper() == "BUY":
-            ax.arrow(last_idx, entry, 5, (tp1-entry)*0.5, head_width=2, head_length=2, fc='white', ec='white', alpha=0.5)
-        else:
+        artists.append(
             ax.arrow(last_idx, entry, 5, (tp1-entry)*0.5, head_width=2, head_length=2, fc='white', ec='white', alpha=0.5)
+        )
+    else:
+        for text in bg.plan_texts:
+            text.set_visible(False)
 
     # Title & Cosmetics
     title_text = f"{plan.symbol if plan else df.columns.name or 'CHART'} | M15 SWING"
     ax.set_title(title_text, color='white', fontsize=12, pad=10)
-    
-    # Limits
-    ax.set_xlim(0, len(work) + 15)
-    
-    # Smart Y-Lim
-    y_vals = work["high"].tail(80).to_list() + work["low"].tail(80).to_list()
-    if plan:
-        y_vals.extend([plan.sl, plan.tp2])
-    
-    y_min, y_max = min(y_vals), max(y_vals)
-    pad = (y_max - y_min) * 0.1
-    ax.set_ylim(y_min - pad, y_max + pad)
 
-    ax.grid(True, color='#2c3e50', alpha=0.3, linestyle='--')
-    ax.legend(loc="upper left", facecolor='#1e272e', edgecolor='none', labelcolor='white')
-    
-    # Remove frame
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['bottom'].set_color('#2c3e50')
-    ax.spines['left'].set_color('#2c3e50')
-    ax.tick_params(axis='x', colors='gray')
-    ax.tick_params(axis='y', colors='gray')
+    return artists
+
+
+def render_swing_chart(
+    df: pd.DataFrame,
+    zones: Dict[str, Optional[Dict[str, Any]]],
+    plan: Optional[RenderPlan],
+    out_path: Optional[str] = None,
+    last_n: int = 220,
+    fig: Optional[Figure] = None,
+) -> Optional[bytes]:
+    """
+    Creates Institutional-Style PNG chart.
+    out_path None -> PNG dikembalikan sebagai bytes (langsung upload, tanpa disk).
+    fig: figure yang dipakai ulang antar tick (tidak di-close). Artist background
+    (candles, EMA, garis harga, zones) dipertahankan dan cuma diganti datanya;
+    rebuild penuh kalau jumlah bar berubah. None -> figure baru, di-close setelah save.
+    """
+    if df is None or len(df) < 50:
+        raise RuntimeError("Not enough data to render chart")
+
+    required = set(OHLC_COLS)
+    if not required.issubset(set(df.columns)):
+        raise RuntimeError(f"DF missing columns: {required - set(df.columns)}")
+
+    # Cuma kolom yang di-plot, sebagai view numpy last_n bar terakhir
+    # (tanpa slice DataFrame + lookup kolom pandas di tiap helper)
+    tail = {col: df[col].to_numpy()[-last_n:] for col in (*OHLC_COLS, *EMA_STYLE) if col in df.columns}
+    ohlc = np.column_stack([tail[col] for col in OHLC_COLS]).astype(np.float32, copy=False)
+
+    owns_fig = fig is None
+    if owns_fig:
+        fig = plt.figure(figsize=(16, 9))
+        bg = _draw_background(fig, tail, ohlc, zones)
+    else:
+        bg_key = _background_key(tail, ohlc, zones)
+        state = _FIG_STATE.get(fig)
+        ema_cols = tuple(col for col in EMA_STYLE if col in tail)
+        if state is not None and fig.axes and state[1].n == len(ohlc) and state[1].ema_cols == ema_cols:
+            # Figure + artist yang sama: overlay lama dibuang, background cuma
+            # di-update datanya kalau bar/zones berubah
+            bg = state[1]
+            for artist in state[2]:
+                artist.remove()
+            if state[0] != bg_key:
+                _update_background(bg, tail, ohlc, zones)
+        else:
+            # Render pertama / jumlah bar berubah -> bangun ulang penuh
+            fig.clear()
+            bg = _draw_background(fig, tail, ohlc, zones)
+
+    overlays = _draw_plan(bg, plan, tail, df)
+    if not owns_fig:
+        _FIG_STATE[fig] = (bg_key, bg, overlays)
+
+    png = None
+    if out_path is None:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=CHART_DPI, facecolor='#0b0e11', pil_kwargs=PNG_KWARGS)
+        png = buf.getvalue()
+    else:
+        outp = Path(out_path)
+        _ensure_dir(outp)
+        fig.savefig(outp.as_posix(), dpi=CHART_DPI, facecolor='#0b0e11', pil_kwargs=PNG_KWARGS)
+    if owns_fig:
+        plt.close(fig)
+    return png
 
-    outp = Path(out_path)
-    _ensure_dir(outp)
-    plt.tight_layout()
-    plt.savefig(outp.as_posix(), dpi=120, facecolor='#0b0e11')
-    plt.close(fig)
\ No newline at end of file